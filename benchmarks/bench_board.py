@@ -0,0 +1,139 @@
+"""
+Moves/sec benchmark of the bitboard `Board` against the original list-of-lists implementation.
+
+Usage:
+    python -m benchmarks.bench_board --size 6 --games 200
+"""
+import argparse
+import random
+import time
+
+from src.game.board import Board
+
+class LegacyBoard:
+    """
+    The original list-of-lists board, kept as a baseline for benchmarks and cross-checks.
+    """
+
+    DIRECTIONS = Board.DIRECTIONS
+
+    def __init__(self, size: int) -> None:
+        self.n = size
+        self.pieces = [[0] * size for _ in range(size)]
+        self.pieces[size // 2 - 1][size // 2 - 1] = 1
+        self.pieces[size // 2][size // 2] = 1
+        self.pieces[size // 2 - 1][size // 2] = -1
+        self.pieces[size // 2][size // 2 - 1] = -1
+
+    def isValidMove(self, x: int, y: int, player: int) -> bool:
+        for dx, dy in self.DIRECTIONS:
+            if x + dx >= self.n or x + dx < 0 or y + dy >= self.n or y + dy < 0:
+                continue
+            if self.pieces[x + dx][y + dy] == 0:
+                continue
+            if self.pieces[x + dx][y + dy] == player:
+                continue
+            for i in range(2, self.n + 1):
+                if x + i * dx >= self.n or x + i * dx < 0 or y + i * dy >= self.n or y + i * dy < 0:
+                    break
+                if self.pieces[x + i * dx][y + i * dy] == 0:
+                    break
+                if self.pieces[x + i * dx][y + i * dy] == player:
+                    return True
+        return False
+
+    def getLegalMoves(self, player: int) -> list[tuple[int, int]]:
+        moves = []
+        for x in range(self.n):
+            for y in range(self.n):
+                if self.pieces[x][y] != 0:
+                    continue
+                if self.isValidMove(x, y, player):
+                    moves.append((x, y))
+        return moves
+
+    def nextBoard(self, move: int, player: int) -> 'LegacyBoard':
+        if move == self.n * self.n:
+            return self
+        x, y = move // self.n, move % self.n
+        if not self.isValidMove(x, y, player):
+            return self
+        pieces = [[self.pieces[i][j] for j in range(self.n)] for i in range(self.n)]
+        pieces[x][y] = player
+        for dx, dy in self.DIRECTIONS:
+            for i in range(1, self.n + 1):
+                if x + i * dx >= self.n or x + i * dx < 0 or y + i * dy >= self.n or y + i * dy < 0:
+                    for j in range(1, i):
+                        pieces[x + j * dx][y + j * dy] = -player
+                    break
+                if pieces[x + i * dx][y + i * dy] == 0:
+                    for j in range(1, i):
+                        pieces[x + j * dx][y + j * dy] = -player
+                    break
+                if pieces[x + i * dx][y + i * dy] == player:
+                    break
+                pieces[x + i * dx][y + i * dy] = player
+        board = LegacyBoard(self.n)
+        board.pieces = pieces
+        return board
+
+def playRandomGames(board_class, size: int, games: int, seed: int) -> tuple[int, list[list[tuple[int, int]]]]:
+    """
+    Plays random games, generating the legal moves of every position and playing one of them.
+
+    Args:
+        board_class: The board implementation to use.
+        size (int): The size of the board.
+        games (int): The number of games to play.
+        seed (int): Seed of the move choices.
+
+    Returns:
+        tuple: The number of moves played and the legal move lists seen, in order.
+    """
+    rng = random.Random(seed)
+    moves_played = 0
+    history = []
+    for _ in range(games):
+        board = board_class(size)
+        player = 1
+        passes = 0
+        while passes < 2:
+            moves = board.getLegalMoves(player)
+            history.append(moves)
+            if moves:
+                x, y = moves[rng.randrange(len(moves))]
+                board = board.nextBoard(x * size + y, player)
+                passes = 0
+            else:
+                passes += 1
+            player = -player
+            moves_played += 1
+    return moves_played, history
+
+def benchmark(board_class, size: int, games: int, seed: int) -> float:
+    """
+    Returns the moves/sec (legal move generation plus move) of a board implementation.
+    """
+    start = time.perf_counter()
+    moves, _ = playRandomGames(board_class, size, games, seed)
+    return moves / (time.perf_counter() - start)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, nargs='+', default=[6, 8])
+    parser.add_argument('--games', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    for size in args.size:
+        _, expected = playRandomGames(LegacyBoard, size, 20, args.seed)
+        _, actual = playRandomGames(Board, size, 20, args.seed)
+        if [sorted(m) for m in expected] != [sorted(m) for m in actual]:
+            raise RuntimeError("bitboard and legacy move generators disagree on {}x{}".format(size, size))
+
+        legacy = benchmark(LegacyBoard, size, args.games, args.seed)
+        bitboard = benchmark(Board, size, args.games, args.seed)
+        print("{}x{}: legacy {:,.0f} moves/s, bitboard {:,.0f} moves/s ({:.1f}x)".format(size, size, legacy, bitboard, bitboard / legacy))
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
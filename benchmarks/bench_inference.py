@@ -0,0 +1,75 @@
+"""
+Latency and throughput of network evaluation on CPU: `OthelloModel.predict` / `predictBatch`
+against the frozen `InferenceModel` (batch normalization folded, no dropout, TorchScript).
+
+Usage:
+    python -m benchmarks.bench_inference --batch-sizes 1 8 64
+    python -m benchmarks.bench_inference --checkpoint ./temp/ best.pth.tar
+"""
+import argparse
+import time
+
+import numpy as np
+
+from src.game.game import Game
+from src.model.model import OthelloModel
+from src.model.inference import InferenceModel
+
+def timeCalls(predict, boards, repeats: int) -> float:
+    """
+    Returns the mean seconds per call of a predict function on a list of boards, after one warm-up call.
+    """
+    predict(boards)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        predict(boards)
+    return (time.perf_counter() - start) / repeats
+
+def randomBoards(game: Game, count: int, seed: int = 0) -> list:
+    """
+    Returns positions reached by random play from the initial board.
+    """
+    rng = np.random.default_rng(seed)
+    boards = []
+    board, player = game.getInitialBoard(), 1
+    while len(boards) < count:
+        if game.hasGameEnded(board, player) != 0:
+            board, player = game.getInitialBoard(), 1
+        boards.append(game.getCanonicalForm(board, player))
+        action = rng.choice(np.flatnonzero(game.getValidMoves(board, player)))
+        board, player = game.nextState(board, player, action)
+    return boards
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=6)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 8, 64])
+    parser.add_argument('--repeats', type=int, default=20)
+    parser.add_argument('--no-script', action='store_true', help="run the folded network eagerly")
+    parser.add_argument('--checkpoint', nargs=2, metavar=('FOLDER', 'FILE'), help="model checkpoint to load")
+    args = parser.parse_args()
+
+    game = Game(args.size)
+    model = OthelloModel(game)
+    if args.checkpoint:
+        model.loadCheckpoint(*args.checkpoint)
+    fast = InferenceModel(model, max(args.batch_sizes), script=not args.no_script)
+
+    for batch_size in args.batch_sizes:
+        boards = randomBoards(game, batch_size)
+        if batch_size == 1:
+            baseline = timeCalls(lambda b: model.predict(b[0]), boards, args.repeats)
+            optimized = timeCalls(lambda b: fast.predict(b[0]), boards, args.repeats)
+        else:
+            baseline = timeCalls(model.predictBatch, boards, args.repeats)
+            optimized = timeCalls(fast.predictBatch, boards, args.repeats)
+
+        pis, vs = model.predictBatch(boards)
+        fast_pis, fast_vs = fast.predictBatch(boards)
+        error = max(np.abs(pis - fast_pis).max(), np.abs(vs - fast_vs).max())
+
+        print("batch {:>3}: predict {:7.2f} ms ({:8,.0f} pos/s) | inference {:7.2f} ms ({:8,.0f} pos/s) | {:.2f}x, max error {:.1e}".format(
+            batch_size, baseline * 1e3, batch_size / baseline, optimized * 1e3, batch_size / optimized, baseline / optimized, error))
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,81 @@
+"""
+Simulations/sec and predictions/sec benchmark of `MCTS.simulate` from the initial position,
+for sequential search and for batched leaf evaluation with virtual loss.
+
+Usage:
+    python -m benchmarks.bench_mcts --sims 100 400 --batch-sizes 1 8 16
+    python -m benchmarks.bench_mcts --sims 100 --batch-sizes 8 --arena-games 20 --checkpoint ./temp/ best.pth.tar
+"""
+import argparse
+import copy
+import time
+
+from src.game.game import Game
+from src.model.model import OthelloModel, args as model_args
+from src.MCTS.mcts import MCTS
+from src.train.arena import Arena
+from src.train.players import MCTSPlayer
+
+class CountingModel:
+    """
+    Wraps a model and counts the positions it evaluates.
+    """
+
+    def __init__(self, model: OthelloModel) -> None:
+        self.model = model
+        self.predictions = 0
+
+    def predict(self, board):
+        self.predictions += 1
+        return self.model.predict(board)
+
+    def predictBatch(self, boards):
+        self.predictions += len(boards)
+        return self.model.predictBatch(boards)
+
+def benchmark(game: Game, model: OthelloModel, args, repeats: int) -> tuple[float, float]:
+    """
+    Returns the simulations/sec and predictions/sec of fresh searches from the initial position.
+    """
+    board = game.getInitialBoard()
+    counter = CountingModel(model)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        MCTS(game, counter, args).simulate(board)
+    elapsed = time.perf_counter() - start
+    return repeats * args.num_sims / elapsed, counter.predictions / elapsed
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=6)
+    parser.add_argument('--sims', type=int, nargs='+', default=[25, 100, 400])
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1])
+    parser.add_argument('--virtual-loss', type=float, default=model_args.virtual_loss)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--arena-games', type=int, default=0, help="games of each batched search against the sequential one")
+    parser.add_argument('--checkpoint', nargs=2, metavar=('FOLDER', 'FILE'), help="model checkpoint to load")
+    args = parser.parse_args()
+
+    game = Game(args.size)
+    model = OthelloModel(game)
+    if args.checkpoint:
+        model.loadCheckpoint(*args.checkpoint)
+
+    for num_sims in args.sims:
+        for batch_size in args.batch_sizes:
+            search_args = copy.copy(model_args)
+            search_args.num_sims = num_sims
+            search_args.mcts_batch_size = batch_size
+            search_args.virtual_loss = args.virtual_loss
+            sims, predictions = benchmark(game, model, search_args, args.repeats)
+            print("num_sims {} batch {}: {:,.0f} sims/s, {:,.0f} predictions/s".format(num_sims, batch_size, sims, predictions))
+
+            if args.arena_games and batch_size > 1:
+                sequential_args = copy.copy(search_args)
+                sequential_args.mcts_batch_size = 1
+                arena = Arena(MCTSPlayer(MCTS(game, model, search_args)), MCTSPlayer(MCTS(game, model, sequential_args)), game)
+                wins, losses, draws = arena.playGames(args.arena_games)
+                print("  batch {} vs sequential: {} wins, {} losses, {} draws".format(batch_size, wins, losses, draws))
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
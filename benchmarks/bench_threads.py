@@ -0,0 +1,71 @@
+"""
+Scaling benchmark of tree-parallel MCTS: simulations/sec of `MCTS.simulate` from the initial
+position with 1 to N threads searching the same tree.
+
+The threads overlap in the network's forward passes, which release the GIL, so the speedup is
+bounded by the cores left to each pass. `--torch-threads` sets the intra-op threads of every pass
+(1 by default, so that the cores go to the search threads).
+
+Usage:
+    python -m benchmarks.bench_threads --threads 1 2 4 8 --sims 400
+    python -m benchmarks.bench_threads --threads 1 4 --engine inference --torch-threads 2
+"""
+import argparse
+import copy
+import os
+import time
+
+import torch
+
+from src.game.game import Game
+from src.model.model import OthelloModel, args as model_args
+from src.model.inference import InferenceModel
+from src.MCTS.mcts import MCTS
+
+def benchmark(game: Game, model, args, repeats: int) -> float:
+    """
+    Returns the simulations/sec of fresh searches from the initial position.
+    """
+    board = game.getInitialBoard()
+    MCTS(game, model, args).simulate(board)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        MCTS(game, model, args).simulate(board)
+    return repeats * args.num_sims / (time.perf_counter() - start)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=6)
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4, os.cpu_count()])
+    parser.add_argument('--sims', type=int, default=200)
+    parser.add_argument('--virtual-loss', type=float, default=model_args.virtual_loss)
+    parser.add_argument('--torch-threads', type=int, default=1, help="intra-op threads of each forward pass")
+    parser.add_argument('--engine', choices=['torch', 'inference'], default='torch',
+                        help="evaluator, 'inference' being the frozen InferenceModel whose calls are serialized")
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--checkpoint', nargs=2, metavar=('FOLDER', 'FILE'), help="model checkpoint to load")
+    args = parser.parse_args()
+
+    torch.set_num_threads(args.torch_threads)
+    game = Game(args.size)
+    model = OthelloModel(game)
+    if args.checkpoint:
+        model.loadCheckpoint(*args.checkpoint)
+    if args.engine == 'inference':
+        model = InferenceModel(model)
+
+    print("{} cores, {} torch threads per forward pass".format(os.cpu_count(), torch.get_num_threads()))
+    baseline = None
+    for threads in sorted(set(args.threads)):
+        search_args = copy.copy(model_args)
+        search_args.num_sims = args.sims
+        search_args.mcts_batch_size = 1
+        search_args.mcts_threads = threads
+        search_args.virtual_loss = args.virtual_loss
+        search_args.eval_cache_size = 0
+        sims = benchmark(game, model, search_args, args.repeats)
+        baseline = baseline or sims
+        print("threads {}: {:,.0f} sims/s, {:.2f}x".format(threads, sims, sims / baseline))
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,102 @@
+"""
+Check of the endgame solver inside MCTS: on random positions whose children are all solved, the Q
+value of every visited move must be the exact solved result of its child, 0 for a forced draw.
+Then checks that self-play with the solver only writes value targets in [-1, 1].
+
+Uses a uniform evaluator, so it needs no checkpoint.
+
+Usage:
+    python -m benchmarks.check_endgame
+    python -m benchmarks.check_endgame --empties 10 --draws 20
+"""
+import argparse
+import random
+import sys
+import types
+
+import numpy as np
+
+from src.game.game import Game
+from src.MCTS.endgame import EndgameSolver
+from src.MCTS.mcts import MCTS
+from src.train.selfplay import runEpisode
+
+class UniformModel:
+    """
+    Evaluator returning a uniform policy and a value of 0.
+    """
+
+    version = None
+
+    def __init__(self, action_size: int) -> None:
+        self.action_size = action_size
+
+    def predict(self, board):
+        return np.full(self.action_size, 1. / self.action_size), 0.0
+
+    def predictBatch(self, boards):
+        return np.full((len(boards), self.action_size), 1. / self.action_size), np.zeros(len(boards))
+
+def randomPosition(game: Game, empties: int, rng: random.Random):
+    """
+    Plays random moves until `empties` squares are empty, returning the canonical board or None if the game ended first.
+    """
+    board, player = game.getInitialBoard(), 1
+    while game.n * game.n - (board.black | board.white).bit_count() > empties:
+        if game.hasGameEnded(board, player) != 0:
+            return None
+        valids = [action for action, valid in enumerate(game.getValidMoves(board, player)) if valid]
+        board, player = game.nextState(board, player, rng.choice(valids))
+    if game.hasGameEnded(board, player) != 0:
+        return None
+    return game.getCanonicalForm(board, player)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=6)
+    parser.add_argument('--empties', type=int, default=8, help="empty squares of the tested positions, their children being solved")
+    parser.add_argument('--sims', type=int, default=100)
+    parser.add_argument('--draws', type=int, default=10, help="forced draws to check")
+    parser.add_argument('--episodes', type=int, default=4, help="self-play games whose value targets are checked")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    game = Game(args.size)
+    model = UniformModel(game.getActionSize())
+    solver = EndgameSolver(args.size)
+    search_args = types.SimpleNamespace(num_sims=args.sims, c_puct=1, eval_cache_size=0, endgame_empties=args.empties - 1)
+    rng = random.Random(args.seed)
+
+    errors = positions = moves = draws = 0
+    while draws < args.draws:
+        board = randomPosition(game, args.empties, rng)
+        if board is None:
+            continue
+        mcts = MCTS(game, model, search_args)
+        mcts.simulate(board)
+        root = mcts.nodes[mcts.stateKey(board)]
+        positions += 1
+        for action in np.flatnonzero(root.N):
+            child, player = game.nextState(board, 1, int(action))
+            value, _ = solver.solve(game.getCanonicalForm(child, player))
+            expected = -np.sign(value) if player == -1 else np.sign(value)
+            moves += 1
+            draws += expected == 0
+            if root.Q[action] != expected:
+                errors += 1
+                print("position {}, action {}: Q {:.3f}, solved {}".format(positions, action, root.Q[action], expected))
+    print("{} moves of {} positions checked, {} forced draws, {} wrong Q values".format(moves, positions, draws, errors))
+
+    np.random.seed(args.seed)
+    search_args = types.SimpleNamespace(num_sims=10, c_puct=1, eval_cache_size=0, endgame_empties=10)
+    values = {v for _ in range(args.episodes) for _, _, v in runEpisode(game, MCTS(game, model, search_args))}
+    out_of_range = sorted(v for v in values if not -1 <= v <= 1)
+    print("self-play value targets: {}".format(sorted(values)))
+
+    if errors or out_of_range:
+        print("FAILED")
+        sys.exit(1)
+    print("PASSED")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
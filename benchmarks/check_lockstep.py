@@ -0,0 +1,101 @@
+"""
+Check that lockstep self-play produces exactly the examples of `runEpisode`: with the same model and
+seed, a game played by `runLockstepEpisodes` must record the same positions, search policies and
+value targets as the same game played alone, with and without the endgame solver. Games played
+together must search their first position like a game alone.
+
+Uses a fixed pseudo-random evaluator, so it needs no checkpoint.
+
+Usage:
+    python -m benchmarks.check_lockstep
+    python -m benchmarks.check_lockstep --sims 25 --games 4
+"""
+import argparse
+import sys
+import types
+
+import numpy as np
+
+from src.game.game import Game
+from src.MCTS.mcts import MCTS
+from src.train.selfplay import runEpisode, runLockstepEpisodes
+
+class FixedModel:
+    """
+    Evaluator whose policy and value are a fixed random function of the board, the same one at every call.
+    """
+
+    version = None
+
+    def __init__(self, n: int, action_size: int, seed: int) -> None:
+        rng = np.random.default_rng(seed)
+        self.policy_weights = rng.normal(size=(n * n, action_size))
+        self.value_weights = rng.normal(size=n * n) / n
+
+    def predict(self, board):
+        pis, vs = self.predictBatch([board])
+        return pis[0], float(vs[0])
+
+    def predictBatch(self, boards):
+        pieces = np.array([np.asarray(board.pieces, dtype=np.float64).ravel() for board in boards])
+        logits = pieces @ self.policy_weights
+        pis = np.exp(logits - logits.max(axis=1, keepdims=True))
+        return pis / pis.sum(axis=1, keepdims=True), np.tanh(pieces @ self.value_weights)
+
+def compare(name: str, expected: list, actual: list, values: bool = True) -> int:
+    """
+    Compares the examples of two games, printing the first difference.
+
+    Args:
+        values (bool): Whether to compare the value targets, which depend on the rest of the game.
+
+    Returns:
+        int: 1 if the games differ, 0 otherwise.
+    """
+    if len(expected) != len(actual):
+        print("{}: {} examples instead of {}".format(name, len(actual), len(expected)))
+        return 1
+    for move, ((board, pi, v), (other_board, other_pi, other_v)) in enumerate(zip(expected, actual)):
+        if board.key != other_board.key or not np.allclose(pi, other_pi) or (values and v != other_v):
+            print("{}, move {}: pi {} z {} instead of pi {} z {}".format(name, move, np.round(other_pi, 4).tolist(), other_v,
+                                                                         np.round(pi, 4).tolist(), v))
+            return 1
+    return 0
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=6)
+    parser.add_argument('--sims', type=int, default=10)
+    parser.add_argument('--games', type=int, default=3, help="games played in lockstep, compared on their first move")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    game = Game(args.size)
+    model = FixedModel(args.size, game.getActionSize(), args.seed)
+
+    errors = 0
+    for endgame_empties in (0, 10):
+        name = "endgame_empties={}".format(endgame_empties)
+        search_args = types.SimpleNamespace(num_sims=args.sims, c_puct=1, eval_cache_size=0, endgame_empties=endgame_empties,
+                                            lockstep_games=1)
+
+        # one game alone draws the same moves from the same seed
+        np.random.seed(args.seed)
+        expected = runEpisode(game, MCTS(game, model, search_args))
+        np.random.seed(args.seed)
+        actual = runLockstepEpisodes(game, model, search_args, 1)[0]
+        errors += compare(name, expected, actual)
+
+        # several games interleave their moves, but each one searches its first position like a game alone
+        search_args.lockstep_games = args.games
+        for i, examples in enumerate(runLockstepEpisodes(game, model, search_args, args.games)):
+            errors += compare("{}, lockstep game {}".format(name, i), expected[:1], examples[:1], values=False)
+        print("{}: {} moves, first policy {}".format(name, len(expected), np.round(expected[0][1], 4).tolist()))
+
+    if errors:
+        print("FAILED")
+        sys.exit(1)
+    print("PASSED")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
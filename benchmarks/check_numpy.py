@@ -0,0 +1,80 @@
+"""
+Parity check of the NumPy evaluator against the torch model: exports a model with `exportNumpy`,
+loads it with `NumpyModel` and compares their policies and values on positions of random games,
+then reports the evaluation time of both and the import time of torch-free search.
+
+Without a checkpoint, the batch normalization statistics of the random model are randomized so
+that the folding is exercised.
+
+Usage:
+    python -m benchmarks.check_numpy
+    python -m benchmarks.check_numpy --checkpoint ./temp/ best.pth.tar --export ./temp/best.npz
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import torch
+
+from src.game.game import Game
+from src.model.model import OthelloModel
+from src.model.inference import exportNumpy, sampleBoards
+from src.model.numpy_model import NumpyModel
+
+def importTime(module: str) -> float:
+    """
+    Returns the seconds a fresh interpreter takes to import a module.
+    """
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', 'import ' + module], check=True)
+    return time.perf_counter() - start
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=6)
+    parser.add_argument('--positions', type=int, default=256)
+    parser.add_argument('--tolerance', type=float, default=1e-4)
+    parser.add_argument('--checkpoint', nargs=2, metavar=('FOLDER', 'FILE'), help="model checkpoint to load")
+    parser.add_argument('--export', help=".npz file to keep the exported weights in")
+    args = parser.parse_args()
+
+    game = Game(args.size)
+    model = OthelloModel(game)
+    if args.checkpoint:
+        model.loadCheckpoint(*args.checkpoint)
+    else:
+        with torch.no_grad():
+            for module in model.net.modules():
+                if isinstance(module, (torch.nn.BatchNorm1d, torch.nn.BatchNorm2d)):
+                    module.running_mean.uniform_(-1, 1)
+                    module.running_var.uniform_(0.5, 2)
+                    module.weight.uniform_(0.5, 1.5)
+                    module.bias.uniform_(-0.5, 0.5)
+
+    filename = args.export or os.path.join(tempfile.mkdtemp(), 'model.npz')
+    exportNumpy(model, filename)
+    numpy_model = NumpyModel(filename)
+
+    boards = sampleBoards(args.size, args.positions)
+    pis, vs = model.predictArray(boards)
+    start = time.perf_counter()
+    numpy_pis, numpy_vs = numpy_model.predictArray(boards)
+    numpy_time = time.perf_counter() - start
+    start = time.perf_counter()
+    model.predictArray(boards)
+    torch_time = time.perf_counter() - start
+
+    error = max(np.abs(pis - numpy_pis).max(), np.abs(vs - numpy_vs).max())
+    print("max error over {} positions: {:.1e}".format(len(boards), error))
+    print("batch of {}: torch {:.1f} ms, numpy {:.1f} ms".format(len(boards), torch_time * 1e3, numpy_time * 1e3))
+    print("import: torch model {:.2f}s, numpy model with MCTS {:.2f}s".format(
+        importTime('src.model.model'), importTime('src.model.numpy_model, src.MCTS.mcts')))
+    print("PASSED" if error <= args.tolerance else "FAILED: error above {:.0e}".format(args.tolerance))
+    sys.exit(0 if error <= args.tolerance else 1)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
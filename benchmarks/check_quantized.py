@@ -0,0 +1,90 @@
+"""
+Acceptance check of the int8 quantized inference model against the float model: arena games
+between MCTS players using each, plus the inference speedup and the serialized model sizes.
+
+The quantized model is accepted unless its arena score (wins plus half the draws) is
+significantly below 50%, with a one-sided test at the given z threshold.
+
+Usage:
+    python -m benchmarks.check_quantized --games 40 --sims 25 --checkpoint ./temp/ best.pth.tar
+    python -m benchmarks.check_quantized --games 40 --linear-only
+"""
+import argparse
+import copy
+import io
+import math
+import time
+import warnings
+
+import torch
+
+from src.game.game import Game
+from src.model.model import OthelloModel, args as model_args
+from src.model.inference import InferenceModel, sampleBoards
+from src.MCTS.mcts import MCTS
+from src.train.arena import Arena
+from src.train.players import MCTSPlayer
+
+def serializedSize(net) -> int:
+    """
+    Returns the size in bytes of a network saved with TorchScript, or of its state dict.
+    """
+    buffer = io.BytesIO()
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        if isinstance(net, torch.jit.ScriptModule):
+            torch.jit.save(net, buffer)
+        else:
+            torch.save(net.state_dict(), buffer)
+    return len(buffer.getvalue())
+
+def latency(model, boards, repeats: int) -> float:
+    """
+    Returns the mean seconds per `predictArray` call on a stack of boards, after one warm-up call.
+    """
+    model.predictArray(boards)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        model.predictArray(boards)
+    return (time.perf_counter() - start) / repeats
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=6)
+    parser.add_argument('--games', type=int, default=40)
+    parser.add_argument('--sims', type=int, default=25)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--z', type=float, default=1.645, help="one-sided z threshold of a significant loss")
+    parser.add_argument('--linear-only', action='store_true', help="keep float convolutions")
+    parser.add_argument('--repeats', type=int, default=10)
+    parser.add_argument('--checkpoint', nargs=2, metavar=('FOLDER', 'FILE'), help="model checkpoint to load")
+    args = parser.parse_args()
+
+    game = Game(args.size)
+    model = OthelloModel(game)
+    if args.checkpoint:
+        model.loadCheckpoint(*args.checkpoint)
+    reference = InferenceModel(model)
+    quantized = InferenceModel(model, quantize=True, quantize_conv=not args.linear_only)
+
+    for batch_size in (1, 64):
+        boards = sampleBoards(args.size, batch_size, seed=args.seed + 1)
+        float_time, int8_time = latency(reference, boards, args.repeats), latency(quantized, boards, args.repeats)
+        print("batch {:>2}: float {:.2f} ms, int8 {:.2f} ms, {:.2f}x".format(batch_size, float_time * 1e3, int8_time * 1e3, float_time / int8_time))
+
+    float_size, int8_size = serializedSize(reference.net), serializedSize(quantized.net)
+    print("size: float {:.1f} MB, int8 {:.1f} MB, {:.1f}x smaller".format(float_size / 2 ** 20, int8_size / 2 ** 20, float_size / int8_size))
+
+    search_args = copy.copy(model_args)
+    search_args.num_sims = args.sims
+    arena = Arena(MCTSPlayer(MCTS(game, quantized, search_args)), MCTSPlayer(MCTS(game, reference, search_args)), game)
+    wins, losses, draws = arena.playGames(args.games, seed=args.seed)
+
+    games = wins + losses + draws
+    score = (wins + 0.5 * draws) / games
+    z = (score - 0.5) / math.sqrt(0.25 / games)
+    print("arena: {} wins, {} losses, {} draws, score {:.1%} (z = {:+.2f})".format(wins, losses, draws, score, z))
+    print("ACCEPTED" if z > -args.z else "REJECTED: the quantized model is significantly weaker")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,125 @@
+"""
+Perft of the move generator: enumerates the game tree from the initial board to each depth with
+`Game.getValidMoves` / `Game.nextState`, counting its leaves, and checks the counts against
+reference values. Doubles as the throughput benchmark of move generation.
+
+A pass (action n * n, when the player to move has no legal move but the game goes on) is one ply.
+A game that ends before the depth is one leaf, also counted as a terminal.
+
+Usage:
+    python -m benchmarks.perft --size 8 --depth 8
+    python -m benchmarks.perft --size 6 --depth 9 --legacy   # the original list-of-lists board, to derive new references
+"""
+import argparse
+import sys
+import time
+
+from src.game.game import Game
+from benchmarks.bench_board import LegacyBoard
+
+# leaf counts by depth, from depth 0; 8x8 are the published Othello perft numbers, 6x6 were computed with both
+# the bitboard and the original list-of-lists move generators
+REFERENCE = {
+    6: [1, 4, 12, 56, 244, 1364, 7604, 47740, 308716, 2114912],
+    8: [1, 4, 12, 56, 244, 1396, 8200, 55092, 390216, 3005288],
+}
+
+class PerftCounts:
+    """
+    Counters of a perft run.
+
+    Attributes:
+        leaves (int): The positions at the given depth, plus the games that ended before it.
+        passes (int): The pass moves played in the tree.
+        terminals (int): The games that ended before the depth.
+    """
+
+    def __init__(self) -> None:
+        self.leaves = 0
+        self.passes = 0
+        self.terminals = 0
+
+def perft(game: Game, board, player: int, depth: int, counts: PerftCounts) -> None:
+    """
+    Counts the leaves of the game tree below a position with the `Game` API.
+
+    Args:
+        game (Game): The game object.
+        board (Board): The position.
+        player (int): The player to move.
+        depth (int): The remaining depth.
+        counts (PerftCounts): The counters to add to.
+    """
+    if depth == 0:
+        counts.leaves += 1
+        return
+    if game.hasGameEnded(board, player) != 0:
+        counts.leaves += 1
+        counts.terminals += 1
+        return
+    pass_action = game.getActionSize() - 1
+    for action, valid in enumerate(game.getValidMoves(board, player)):
+        if valid:
+            if action == pass_action:
+                counts.passes += 1
+            next_board, next_player = game.nextState(board, player, action)
+            perft(game, next_board, next_player, depth - 1, counts)
+
+def legacyPerft(board: LegacyBoard, player: int, depth: int, counts: PerftCounts) -> None:
+    """
+    Counts the leaves of the game tree below a position with the original list-of-lists board.
+
+    Args:
+        board (LegacyBoard): The position.
+        player (int): The player to move.
+        depth (int): The remaining depth.
+        counts (PerftCounts): The counters to add to.
+    """
+    if depth == 0:
+        counts.leaves += 1
+        return
+    moves = board.getLegalMoves(player)
+    if not moves:
+        if not board.getLegalMoves(-player):
+            counts.leaves += 1
+            counts.terminals += 1
+            return
+        counts.passes += 1
+        legacyPerft(board, -player, depth - 1, counts)
+        return
+    for x, y in moves:
+        legacyPerft(board.nextBoard(x * board.n + y, player), -player, depth - 1, counts)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=8)
+    parser.add_argument('--depth', type=int, default=7)
+    parser.add_argument('--legacy', action='store_true', help="use the original list-of-lists board")
+    args = parser.parse_args()
+
+    game = Game(args.size)
+    reference = REFERENCE.get(args.size, [])
+    mismatches = 0
+
+    print("{:>5} {:>12} {:>8} {:>9} {:>9} {:>12}  {}".format('depth', 'leaves', 'passes', 'terminals', 'seconds', 'leaves/s', 'reference'))
+    for depth in range(1, args.depth + 1):
+        counts = PerftCounts()
+        start = time.perf_counter()
+        if args.legacy:
+            legacyPerft(LegacyBoard(args.size), 1, depth, counts)
+        else:
+            perft(game, game.getInitialBoard(), 1, depth, counts)
+        elapsed = time.perf_counter() - start
+
+        if depth < len(reference):
+            check = 'ok' if counts.leaves == reference[depth] else 'MISMATCH, expected {}'.format(reference[depth])
+            mismatches += counts.leaves != reference[depth]
+        else:
+            check = '-'
+        print("{:>5} {:>12,} {:>8,} {:>9,} {:>9.2f} {:>12,.0f}  {}".format(
+            depth, counts.leaves, counts.passes, counts.terminals, elapsed, counts.leaves / elapsed, check))
+
+    sys.exit(1 if mismatches else 0)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,252 @@
+"""
+Benchmark suite of the game, search, model and training stages, written to JSON and comparable
+between runs.
+
+Stages:
+    board     random games with `Board.getLegalMoves` / `Board.nextBoard`, positions/sec
+    mcts      `MCTS.simulate` simulations/sec from the initial position, at each --sims
+    predict   `OthelloModel.predict` latency at batch 1 and `predictBatch` throughput at batch 64
+    train     `OthelloModel.train` samples/sec over one epoch
+    selfplay  end-to-end self-play games/hour
+    arena     MCTS against MCTS arena games/hour
+
+Usage:
+    python -m benchmarks.suite --output results.json
+    python -m benchmarks.suite --stages board mcts --quick
+    python -m benchmarks.suite --compare baseline.json results.json --threshold 0.1
+"""
+import argparse
+import copy
+import json
+import platform
+import sys
+import time
+
+import numpy as np
+import torch
+
+import src.model.model as model_module
+from src.game.board import Board
+from src.game.game import Game
+from src.model.model import OthelloModel
+from src.model.inference import sampleBoards
+from src.MCTS.mcts import MCTS
+from src.train.arena import Arena
+from src.train.players import MCTSPlayer
+from src.train.replay import ReplayBuffer
+from src.train.selfplay import runEpisode
+from src.train.storage import ExampleShard
+from benchmarks.bench_board import playRandomGames
+from benchmarks.bench_inference import randomBoards
+
+STAGES = ['board', 'mcts', 'predict', 'train', 'selfplay', 'arena']
+
+def metric(value: float, unit: str, higher_is_better: bool = True) -> dict:
+    """
+    Returns the JSON record of one measurement.
+    """
+    return {'value': value, 'unit': unit, 'higher_is_better': higher_is_better}
+
+def searchArgs(num_sims: int):
+    """
+    Returns the model arguments with a number of simulations and without the evaluation cache,
+    so that stages do not answer each other's evaluations.
+    """
+    args = copy.copy(model_module.args)
+    args.num_sims = num_sims
+    args.eval_cache_size = 0
+    return args
+
+def benchBoard(game: Game, model: OthelloModel, options) -> dict:
+    """
+    Positions/sec of random games, generating the legal moves of every position.
+    """
+    games = 50 if options.quick else 300
+    start = time.perf_counter()
+    positions, _ = playRandomGames(Board, game.n, games, options.seed)
+    return {'board.positions_per_sec': metric(positions / (time.perf_counter() - start), 'positions/s')}
+
+def benchMCTS(game: Game, model: OthelloModel, options) -> dict:
+    """
+    Simulations/sec of fresh searches from the initial position.
+    """
+    results = {}
+    board = game.getInitialBoard()
+    for num_sims in options.sims:
+        args = searchArgs(num_sims)
+        MCTS(game, model, args).simulate(board)
+        repeats = 1 if options.quick else 3
+        start = time.perf_counter()
+        for _ in range(repeats):
+            MCTS(game, model, args).simulate(board)
+        results['mcts.sims_per_sec.{}'.format(num_sims)] = metric(repeats * num_sims / (time.perf_counter() - start), 'sims/s')
+    return results
+
+def benchPredict(game: Game, model: OthelloModel, options) -> dict:
+    """
+    Latency of single predictions and throughput of batches of 64.
+    """
+    repeats = 10 if options.quick else 50
+    boards = randomBoards(game, 64, options.seed)
+
+    model.predict(boards[0])
+    start = time.perf_counter()
+    for _ in range(repeats):
+        model.predict(boards[0])
+    latency = (time.perf_counter() - start) / repeats
+
+    model.predictBatch(boards)
+    start = time.perf_counter()
+    for _ in range(max(repeats // 5, 1)):
+        model.predictBatch(boards)
+    throughput = max(repeats // 5, 1) * len(boards) / (time.perf_counter() - start)
+    return {
+        'predict.latency_ms.1': metric(latency * 1e3, 'ms', higher_is_better=False),
+        'predict.positions_per_sec.64': metric(throughput, 'positions/s'),
+    }
+
+def benchTrain(game: Game, model: OthelloModel, options) -> dict:
+    """
+    Samples/sec of one training epoch on random examples.
+    """
+    count = 1024 if options.quick else 4096
+    rng = np.random.default_rng(options.seed)
+    pis = rng.random((count, game.getActionSize()), dtype=np.float32)
+    shard = ExampleShard(sampleBoards(game.n, count, options.seed), pis / pis.sum(axis=1, keepdims=True),
+                         rng.choice([-1.0, 1.0], count).astype(np.float32))
+    replay = ReplayBuffer(count, game.n, game.getActionSize())
+    replay.extend(shard, 0)
+
+    # train a copy, one epoch
+    trainee = OthelloModel(game)
+    trainee.net.load_state_dict(model.net.state_dict())
+    epochs = model_module.args.epochs
+    model_module.args.epochs = 1
+    try:
+        start = time.perf_counter()
+        trainee.train(replay)
+        elapsed = time.perf_counter() - start
+    finally:
+        model_module.args.epochs = epochs
+    samples = count // model_module.args.batch_size * model_module.args.batch_size
+    return {'train.samples_per_sec': metric(samples / elapsed, 'samples/s')}
+
+def benchSelfPlay(game: Game, model: OthelloModel, options) -> dict:
+    """
+    Games/hour of sequential self-play episodes.
+    """
+    games = 1 if options.quick else 4
+    args = searchArgs(options.game_sims)
+    np.random.seed(options.seed)
+    start = time.perf_counter()
+    for _ in range(games):
+        runEpisode(game, MCTS(game, model, args))
+    return {'selfplay.games_per_hour': metric(games / (time.perf_counter() - start) * 3600, 'games/h')}
+
+def benchArena(game: Game, model: OthelloModel, options) -> dict:
+    """
+    Games/hour of seeded arena games between two MCTS players.
+    """
+    games = 2 if options.quick else 6
+    args = searchArgs(options.game_sims)
+    arena = Arena(MCTSPlayer(MCTS(game, model, args)), MCTSPlayer(MCTS(game, model, args)), game)
+    start = time.perf_counter()
+    arena.playGames(games, seed=options.seed)
+    return {'arena.games_per_hour': metric(games / (time.perf_counter() - start) * 3600, 'games/h')}
+
+BENCHMARKS = {
+    'board': benchBoard,
+    'mcts': benchMCTS,
+    'predict': benchPredict,
+    'train': benchTrain,
+    'selfplay': benchSelfPlay,
+    'arena': benchArena,
+}
+
+def run(options) -> dict:
+    """
+    Runs the selected stages and returns the JSON report.
+    """
+    torch.manual_seed(options.seed)
+    game = Game(options.size)
+    model = OthelloModel(game)
+    if options.checkpoint:
+        model.loadCheckpoint(*options.checkpoint)
+
+    results = {}
+    for stage in options.stages:
+        stage_results = BENCHMARKS[stage](game, model, options)
+        for name, record in stage_results.items():
+            print("{:<32} {:>14,.2f} {}".format(name, record['value'], record['unit']))
+        results.update(stage_results)
+
+    return {
+        'meta': {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'torch': torch.__version__,
+            'platform': platform.platform(),
+            'threads': torch.get_num_threads(),
+            'size': options.size,
+            'num_channels': model_module.args.num_channels,
+            'quick': options.quick,
+        },
+        'results': results,
+    }
+
+def compare(baseline: dict, current: dict, threshold: float) -> list[str]:
+    """
+    Prints the relative change of every metric of two reports and returns the regressed ones.
+
+    A metric regresses when it is worse than the baseline by more than `threshold`, as a fraction of the baseline.
+    """
+    regressions = []
+    for name, record in current['results'].items():
+        if name not in baseline['results']:
+            print("{:<32} {:>14,.2f} {} (new)".format(name, record['value'], record['unit']))
+            continue
+        old = baseline['results'][name]['value']
+        change = record['value'] / old - 1 if old else 0.0
+        # positive when better
+        gain = change if record['higher_is_better'] else -change
+        flag = ''
+        if gain < -threshold:
+            flag = 'REGRESSION'
+            regressions.append(name)
+        elif gain > threshold:
+            flag = 'improved'
+        print("{:<32} {:>14,.2f} -> {:>14,.2f} {:<12} {:+7.1%} {}".format(name, old, record['value'], record['unit'], change, flag))
+    return regressions
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=STAGES)
+    parser.add_argument('--size', type=int, default=6)
+    parser.add_argument('--sims', type=int, nargs='+', default=[25, 100], help="num_sims of the mcts stage")
+    parser.add_argument('--game-sims', type=int, default=10, help="num_sims of the selfplay and arena stages")
+    parser.add_argument('--quick', action='store_true', help="fewer repetitions, noisier numbers")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--checkpoint', nargs=2, metavar=('FOLDER', 'FILE'), help="model checkpoint to load")
+    parser.add_argument('--output', help="JSON file to write the results to")
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CURRENT'), help="compare two result files instead of running")
+    parser.add_argument('--threshold', type=float, default=0.1, help="relative slowdown reported as a regression")
+    options = parser.parse_args()
+
+    if options.compare:
+        with open(options.compare[0]) as f:
+            baseline = json.load(f)
+        with open(options.compare[1]) as f:
+            current = json.load(f)
+        regressions = compare(baseline, current, options.threshold)
+        if regressions:
+            print("{} regression(s): {}".format(len(regressions), ", ".join(regressions)))
+            sys.exit(1)
+        return
+
+    report = run(options)
+    if options.output:
+        with open(options.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
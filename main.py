@@ -9,6 +9,15 @@ class Args:
 
 args_dict = {
     'size': 6, # size of the board
+    'debug': False, # check MCTS state keys for collisions
+    'endgame_empties': 10, # opt-in: empty squares at or below which MCTS and self-play use the exact endgame solver (changes the value targets), 0 to disable
+    'mcts_stats': False, # print MCTS statistics (sims/s, NN calls, depth, tree size) of self-play and arena searches
+    'num_workers': 1, # self-play processes, above 1 to batch their evaluations in an inference server
+    'lockstep_games': 1, # self-play games advanced together in this process, their leaves batched in one forward pass
+    'arena_workers': 1, # processes playing the gating arena games
+    'arena_seed': None, # base seed making arena results independent of arena_workers
+    'examples_pi_dtype': 'float32', # dtype of the stored policies, float16 halves the size of the example shards
+    'replay_capacity': None, # examples kept for training, maxlen_queue * num_iters_history if not set
     # TODO: add arguments
 }
 
@@ -26,7 +35,7 @@ def main():
     trainer = Trainer(game, model, args)
 
     if args.load_model:
-        trainer.loadTrainExamples()
+        trainer.loadExamples()
 
     trainer.learn()
 
@@ -1,6 +1,7 @@
 from src.game.game import Game
-from src.model.model import OthelloModel
-from MCTS.mcts import MCTS
+from src.MCTS.mcts import MCTS
+from src.MCTS.book import OpeningBook
+from src.MCTS.timing import TimeManager
 from src.train.arena import Arena
 from src.train.players import *
 
@@ -12,6 +13,14 @@ class Args:
 args_dict = {
     'size': 6, # size of the board
     'opponent': 'mcts', # opponent to play against
+    'engine': 'torch', # network evaluation of the mcts opponent, 'numpy' runs an exported .npz without torch
+    'num_sims': 25, # simulations per move of the mcts opponent
+    'c_puct': 1, # exploration constant of the mcts opponent
+    'num_games': 2, # games to play
+    'book': None, # opening book file of the mcts opponent, written by src.MCTS.book, None to search every move
+    'book_temperature': 1.0, # sampling temperature of the book moves, 0 to play the most visited one
+    'move_time': None, # seconds per move of the mcts opponent, None for num_sims simulations per move
+    'game_time': None, # seconds on the mcts opponent's clock for a whole game, spread over its moves
     # TODO: add arguments
 }
 
@@ -24,11 +33,19 @@ def main():
     game = Game(args.size)
 
     if args.opponent == 'mcts':
-        model = OthelloModel(game)
-        # TODO: change file and folder names
-        model.loadCheckpoint('./temp/', 'best.pth.tar')
+        if args.engine == 'numpy':
+            from src.model.numpy_model import NumpyModel
+            # TODO: change file and folder names, written by src.model.inference.exportNumpy
+            model = NumpyModel('./temp/best.npz')
+        else:
+            from src.model.model import OthelloModel
+            model = OthelloModel(game)
+            # TODO: change file and folder names
+            model.loadCheckpoint('./temp/', 'best.pth.tar')
         mcts = MCTS(game, model, args)
-        player2 = MCTSPlayer(mcts)
+        book = OpeningBook.load(args.book) if args.book else None
+        time_manager = TimeManager(args.game_time) if args.game_time else None
+        player2 = MCTSPlayer(mcts, book, args.book_temperature, move_time=args.move_time, time_manager=time_manager, verbose=True)
 
     elif args.opponent == 'random':
         player2 = RandomPlayer()
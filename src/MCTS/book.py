@@ -0,0 +1,225 @@
+"""
+Opening book: the search policies of the first positions of a game, computed offline with deep MCTS.
+
+Positions are keyed by the Zobrist key of their symmetry-canonical representative (`Board.canonicalSymmetry`),
+so the 8 symmetric copies of a position share one entry, stored with the actions of the representative.
+A book is one .npz file:
+    size     the size of the board
+    keys     uint64 sorted keys of the positions, of shape (P,)
+    offsets  int64 start of the moves of each position in `actions` and `counts`, of shape (P + 1,)
+    actions  uint16 actions visited by the search, in the orientation of the representative
+    counts   uint32 visit counts of those actions
+
+Usage (building a book from a checkpoint):
+    python -m src.MCTS.book temp/book.npz --checkpoint temp best.pth.tar --depth 6 --sims 800
+"""
+from src.game.board import Board, getGeometry
+from src.game.game import Game
+from src.MCTS.mcts import MCTS
+
+import argparse
+import copy
+import os
+import numpy as np
+from tqdm import tqdm
+
+class OpeningBook:
+    """
+    Visit distributions of book positions, looked up by binary search on the sorted keys.
+
+    Attributes:
+        n (int): The size of the board.
+        keys (np.ndarray): The sorted keys of the positions.
+        offsets (np.ndarray): The start of the moves of each position, followed by the total number of moves.
+        actions (np.ndarray): The actions of all positions, in the orientation of their representative.
+        counts (np.ndarray): The visit counts of those actions.
+        from_canonical (np.ndarray): Per symmetry, the action of a board matching each action of its representative.
+    """
+
+    def __init__(self, n: int, keys: np.ndarray, offsets: np.ndarray, actions: np.ndarray, counts: np.ndarray) -> None:
+        """
+        Initializes a book from its arrays.
+
+        Args:
+            n (int): The size of the board.
+            keys (np.ndarray): The sorted keys of the positions.
+            offsets (np.ndarray): The start of the moves of each position, followed by the total number of moves.
+            actions (np.ndarray): The actions of all positions.
+            counts (np.ndarray): The visit counts of those actions.
+        """
+        self.n = n
+        self.keys = keys
+        self.offsets = offsets
+        self.actions = actions
+        self.counts = counts
+
+        # the pass action is mapped to itself
+        to_canonical = np.array([p + [n * n] for p in getGeometry(n).symmetries])
+        self.from_canonical = np.argsort(to_canonical, axis=1)
+
+    @staticmethod
+    def fromEntries(n: int, entries: dict) -> 'OpeningBook':
+        """
+        Builds a book from the visit counts of each position.
+
+        Args:
+            n (int): The size of the board.
+            entries (dict): Maps the key of each representative to its visit counts over all actions, in its orientation.
+
+        Returns:
+            OpeningBook: The book, keeping only the visited actions.
+        """
+        keys = np.array(sorted(entries), dtype=np.uint64)
+        actions, counts, offsets = [], [], [0]
+        for key in keys.tolist():
+            visited = np.flatnonzero(entries[key])
+            actions.append(visited)
+            counts.append(np.asarray(entries[key])[visited])
+            offsets.append(offsets[-1] + len(visited))
+        return OpeningBook(n, keys, np.array(offsets, dtype=np.int64),
+                           np.concatenate(actions).astype(np.uint16) if actions else np.zeros(0, dtype=np.uint16),
+                           np.concatenate(counts).astype(np.uint32) if counts else np.zeros(0, dtype=np.uint32))
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def save(self, filename: str) -> None:
+        """
+        Writes the book to an .npz file, replacing it atomically.
+
+        Args:
+            filename (str): The file.
+        """
+        folder = os.path.dirname(filename)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        tmp = filename + '.tmp'
+        with open(tmp, 'wb') as f:
+            np.savez_compressed(f, size=self.n, keys=self.keys, offsets=self.offsets, actions=self.actions, counts=self.counts)
+        os.replace(tmp, filename)
+
+    @staticmethod
+    def load(filename: str) -> 'OpeningBook':
+        """
+        Reads a book written by `save`.
+
+        Args:
+            filename (str): The file.
+
+        Returns:
+            OpeningBook: The book.
+        """
+        with np.load(filename) as data:
+            return OpeningBook(int(data['size']), data['keys'], data['offsets'], data['actions'], data['counts'])
+
+    def lookup(self, board: Board) -> tuple[np.ndarray, np.ndarray] | None:
+        """
+        Looks up a position.
+
+        Args:
+            board (Board): The board, from the perspective of the player to move.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray] | None: The visited actions of the board and their visit counts,
+            None if the position is not in the book.
+        """
+        key, symmetry = board.canonicalSymmetry()
+        i = int(np.searchsorted(self.keys, np.uint64(key)))
+        if i == len(self.keys) or int(self.keys[i]) != key:
+            return None
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return self.from_canonical[symmetry][self.actions[start:end]], self.counts[start:end]
+
+    def sample(self, board: Board, temperature: float = 1.0) -> int | None:
+        """
+        Picks the action of a book position from its visit distribution.
+
+        Args:
+            board (Board): The board, from the perspective of the player to move.
+            temperature (float): Visit counts are raised to 1 / temperature before sampling, 0 to play the most visited action.
+
+        Returns:
+            int | None: The action, None if the position is not in the book.
+        """
+        entry = self.lookup(board)
+        if entry is None:
+            return None
+        actions, counts = entry
+        if temperature == 0:
+            return int(actions[counts.argmax()])
+        weights = counts.astype(np.float64) ** (1. / temperature)
+        return int(np.random.choice(actions, p=weights / weights.sum()))
+
+def buildBook(game: Game, model, args, depth: int, min_share: float = 0.1) -> OpeningBook:
+    """
+    Searches the positions of the first `depth` moves of a game, following the moves the search plays
+    at least `min_share` of the time.
+
+    Args:
+        game (Game): The game object.
+        model (OthelloModel): The model to search with.
+        args: Arguments of the search, with `num_sims`.
+        depth (int): The number of moves covered by the book.
+        min_share (float): The share of the visits a move needs for its position to be added.
+
+    Returns:
+        OpeningBook: The book.
+    """
+    n = game.n
+    mcts = MCTS(game, model, args)
+    to_canonical = [p + [n * n] for p in getGeometry(n).symmetries]
+
+    entries = {}
+    frontier = [game.getInitialBoard()]
+    for ply in range(depth):
+        next_frontier = []
+        for board in tqdm(frontier, desc="Book ply {}".format(ply)):
+            key, symmetry = board.canonicalSymmetry()
+            if key in entries or game.hasGameEnded(board, 1) != 0:
+                continue
+
+            # keep the subtree of the position if an earlier search reached it
+            mcts.reroot(board)
+            pi = np.array(mcts.simulate(board))
+            # the visits of the root, including those of earlier searches through its subtree
+            node = mcts.nodes.get(mcts.stateKey(board))
+            counts = np.zeros(len(pi), dtype=np.uint32)
+            if node is None or node.N is None:
+                # solved without searching, one visit on the solver's move
+                counts[to_canonical[symmetry]] = pi
+            elif mcts.symmetric:
+                # the node is already stored in the orientation of the representative
+                counts[:] = node.N
+            else:
+                counts[to_canonical[symmetry]] = node.N
+            entries[key] = counts
+
+            for action in np.flatnonzero(pi >= min_share):
+                next_board, next_player = game.nextState(board, 1, int(action))
+                next_frontier.append(game.getCanonicalForm(next_board, next_player))
+        frontier = next_frontier
+
+    return OpeningBook.fromEntries(n, entries)
+
+if __name__ == "__main__":
+    from src.model.model import OthelloModel, args as model_args
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('output', help="the .npz file to write")
+    parser.add_argument('--checkpoint', nargs=2, metavar=('FOLDER', 'FILE'), help="model checkpoint to search with")
+    parser.add_argument('--size', type=int, default=6)
+    parser.add_argument('--depth', type=int, default=6, help="number of moves covered")
+    parser.add_argument('--sims', type=int, default=800, help="simulations per position")
+    parser.add_argument('--min-share', type=float, default=0.1, help="visit share of the moves whose positions are added")
+    options = parser.parse_args()
+
+    game = Game(options.size)
+    model = OthelloModel(game)
+    if options.checkpoint:
+        model.loadCheckpoint(*options.checkpoint)
+    search_args = copy.copy(model_args)
+    search_args.num_sims = options.sims
+
+    book = buildBook(game, model, search_args, options.depth, options.min_share)
+    book.save(options.output)
+    print("Wrote {} positions, {:,} bytes".format(len(book), os.path.getsize(options.output)))
\ No newline at end of file
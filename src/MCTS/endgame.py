@@ -0,0 +1,156 @@
+from src.game.board import Board, getGeometry, legalMovesMask, flipsMask, iterBits
+
+class EndgameSolver:
+    """
+    Alpha-beta (negamax) solver of endgame positions, searching the bitboards to the end of the game.
+
+    Positions are stored in a transposition table with the bounds found on their value and the best move,
+    which is tried first when the position is searched again. The other moves are ordered fastest-first,
+    the ones leaving the opponent the fewest replies first.
+
+    Attributes:
+        n (int): The size of the board.
+        exact (bool): Whether values are final disc differences, or only -1, 0 or 1 for a loss, draw or win.
+        max_entries (int): The size of the transposition table above which it is cleared.
+        table (dict): Maps (own, opp) bitboards to the (lower bound, upper bound, best move) of the position.
+        nodes (int): The number of positions searched since the solver was created.
+    """
+
+    # below this many empty squares, ordering the moves costs more than it saves
+    MIN_ORDER_EMPTIES = 4
+
+    def __init__(self, n: int, exact: bool = False, max_entries: int = 1000000) -> None:
+        """
+        Initializes a solver with an empty transposition table.
+
+        Args:
+            n (int): The size of the board.
+            exact (bool): Whether to compute disc differences instead of win/draw/loss.
+            max_entries (int): The size of the transposition table above which it is cleared.
+        """
+        self.n = n
+        self.geometry = getGeometry(n)
+        self.exact = exact
+        self.max_entries = max_entries
+        self.table = {}
+        self.nodes = 0
+        self.bound = n * n if exact else 1
+
+    def __getstate__(self) -> dict:
+        # the table stays behind when a solver is sent to another process
+        state = self.__dict__.copy()
+        state['table'] = {}
+        del state['geometry']
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self.geometry = getGeometry(self.n)
+
+    def empties(self, board: Board) -> int:
+        """
+        Counts the empty squares of a board.
+
+        Args:
+            board (Board): The board.
+
+        Returns:
+            int: The number of empty squares.
+        """
+        return self.n * self.n - (board.black | board.white).bit_count()
+
+    def solve(self, board: Board, player: int = 1) -> tuple[int, int]:
+        """
+        Solves a position.
+
+        Args:
+            board (Board): The board.
+            player (int): The player to move.
+
+        Returns:
+            tuple[int, int]: The value of the position for the player to move under perfect play, and the best
+            action (n * n to pass, also when the game is over).
+        """
+        own, opp = (board.black, board.white) if player == 1 else (board.white, board.black)
+        value = self.negamax(own, opp, -self.bound, self.bound)
+        entry = self.table.get((own, opp))
+        return value, entry[2] if entry is not None else self.n * self.n
+
+    def score(self, own: int, opp: int) -> int:
+        """
+        Returns the value of a finished game for the player to move.
+
+        Args:
+            own (int): Bitboard of the player to move.
+            opp (int): Bitboard of the opponent.
+
+        Returns:
+            int: The disc difference, or its sign without `exact`.
+        """
+        diff = own.bit_count() - opp.bit_count()
+        if self.exact:
+            return diff
+        return (diff > 0) - (diff < 0)
+
+    def negamax(self, own: int, opp: int, alpha: int, beta: int) -> int:
+        """
+        Searches a position with an alpha-beta window.
+
+        Args:
+            own (int): Bitboard of the player to move.
+            opp (int): Bitboard of the opponent.
+            alpha (int): The value the player to move is already guaranteed.
+            beta (int): The value the opponent is already guaranteed to hold the player to.
+
+        Returns:
+            int: The value of the position if it lies inside the window, otherwise a bound on the
+            side of the window it fell on (fail-soft).
+        """
+        self.nodes += 1
+        geometry = self.geometry
+        moves = legalMovesMask(own, opp, geometry)
+        if not moves and not legalMovesMask(opp, own, geometry):
+            return self.score(own, opp)
+
+        key = (own, opp)
+        lower, upper, tt_move = self.table.get(key, (-self.bound, self.bound, -1))
+        if lower >= beta:
+            return lower
+        if upper <= alpha or lower == upper:
+            return upper
+        alpha, beta = max(alpha, lower), min(beta, upper)
+
+        pass_action = self.n * self.n
+        if not moves:
+            best, best_move = -self.negamax(opp, own, -beta, -alpha), pass_action
+        else:
+            children = []
+            for square in iterBits(moves):
+                bit = 1 << square
+                flips = flipsMask(bit, own, opp, geometry)
+                children.append((square, own | bit | flips, opp & ~flips))
+            if len(children) > 1 and pass_action - (own | opp).bit_count() >= self.MIN_ORDER_EMPTIES:
+                # the table's best move first, then the fewest opponent replies first
+                children.sort(key=lambda child: -1 if child[0] == tt_move else legalMovesMask(child[2], child[1], geometry).bit_count())
+
+            best, best_move = -self.bound - 1, -1
+            a = alpha
+            for square, next_own, next_opp in children:
+                value = -self.negamax(next_opp, next_own, -beta, -a)
+                if value > best:
+                    best, best_move = value, square
+                    if value >= beta:
+                        break
+                    a = max(a, value)
+
+        if best <= alpha:
+            # failed low: an upper bound, and no move is better than the one found before
+            upper, best_move = best, tt_move if tt_move >= 0 else best_move
+        elif best >= beta:
+            lower = best
+        else:
+            lower = upper = best
+        if len(self.table) >= self.max_entries:
+            self.table.clear()
+        self.table[key] = (lower, upper, best_move)
+        return best
\ No newline at end of file
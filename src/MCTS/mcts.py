@@ -1,11 +1,21 @@
 import numpy as np
+import contextlib
 import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
 
-from torch import le
-
-from src.game.board import Board
+from src.game.board import Board, getGeometry
 from src.game.game import Game
-from src.model.model import OthelloModel
+from src.model.cache import getEvaluationCache
+from src.MCTS.node import Node
+from src.MCTS.endgame import EndgameSolver
+from src.MCTS.stats import SearchStats, statsHooks
+
+if TYPE_CHECKING:
+    # only for annotations, so that searching with a `NumpyModel` does not import torch
+    from src.model.model import OthelloModel
 
 EPS = 1e-8
 
@@ -15,17 +25,38 @@ class MCTS:
 
     Attributes:
         game (Game): The game environment.
-        model (OthelloModel): The neural network model.
+        model (OthelloModel): The neural network model, or any evaluator with the same `version`, `predict` and `predictBatch`
+            (and `thread_safe` set to False if it cannot be called from several threads at once).
         args: Additional arguments for MCTS.
-        Q_sa (dict): Stores Q values for state-action pairs.
-        N_sa (dict): Stores the number of times each state-action pair was visited.
-        N_s (dict): Stores the number of times each state was visited.
-        P_s (dict): Stores the policy (probabilities) returned by the neural network.
-        Ended_s (dict): Stores if a state is terminal.
-        Valids_s (dict): Stores valid moves for each state.
+        nodes (dict): Maps each visited state to its `Node`, which holds the policy, visit counts, Q values and valid moves as arrays.
+        Boards_s (dict): In debug mode, stores the bitboards behind each state key to detect Zobrist collisions.
+        root (int): The key of the state the last simulation started from.
+        max_nodes (int): Cap on the number of nodes from `args.max_nodes` and `args.max_tree_bytes`, None if unbounded.
+        generation (int): The number of descents so far, stamped on the nodes each descent reaches.
+        cache (EvaluationCache): The process-wide cache of network evaluations, None if `args.eval_cache_size` is 0.
+        symmetric (bool): Whether symmetric positions share one node and one evaluation (`args.symmetry_canonical`).
+        collect_stats (bool): Whether `simulate` records statistics (`args.mcts_stats`).
+        stats (SearchStats): The statistics of the running `simulate` call, None outside of it or without `collect_stats`.
+        last_stats (SearchStats): The statistics of the last `simulate` call.
+        total_stats (SearchStats): The statistics of all `simulate` calls.
+        last_sims (int): The number of simulations of the last `simulate` call.
+        last_seconds (float): The duration of the last `simulate` call.
+        endgame_empties (int): The number of empty squares at or below which positions are solved exactly (`args.endgame_empties`), 0 to always search.
+        endgame (EndgameSolver): The solver of those positions, None if `endgame_empties` is 0.
+        solutions (dict): The result and best action of each board solved since the last `reroot`, by `Board.key`.
+        threads (int): The number of threads searching the tree concurrently (`args.mcts_threads`).
+
+    States are keyed by the Zobrist key of the canonical board (`Board.key`). With `symmetric`, they are
+    keyed by the representative of the board's 8 symmetries instead, and node arrays are indexed by the
+    actions of that representative. Call `reroot` after each
+    move to release the nodes that can no longer be reached; beyond `max_nodes` the least recently
+    reached nodes are evicted and re-expanded if the search comes back to them.
+
+    Once at most `endgame_empties` squares are empty, positions are solved instead of evaluated: leaves
+    become terminal nodes holding their exact result, and at the root `simulate` returns the solver's move.
     """
 
-    def __init__(self, game: Game, model: OthelloModel, args) -> None:
+    def __init__(self, game: Game, model: 'OthelloModel', args) -> None:
         """
         Initialize the MCTS algorithm.
 
@@ -38,119 +69,718 @@ class MCTS:
         self.model = model
         self.args = args
 
-        self.Q_sa = {}     # stores Q values for s, a
-        self.N_sa = {}     # stores times edge s, a was visited
-        self.N_s = {}      # stores times board s was visited
-        self.P_s = {}      # stores policy (probabilities) returned by neural network
+        self.nodes = {}    # stores the node of each visited state
+        self.root = None
+
+        self.max_nodes = getattr(args, 'max_nodes', None)
+        max_tree_bytes = getattr(args, 'max_tree_bytes', None)
+        if max_tree_bytes:
+            max_nodes = max(1, max_tree_bytes // Node.approxBytes(game.getActionSize()))
+            self.max_nodes = min(self.max_nodes, max_nodes) if self.max_nodes else max_nodes
+        self.generation = 0
+
+        self.cache = getEvaluationCache(getattr(args, 'eval_cache_size', 0))
+
+        self.symmetric = getattr(args, 'symmetry_canonical', False)
+        if self.symmetric:
+            n = game.n
+            pass_action = [n * n]
+            # to_canonical[t][a] is the action of the representative matching action a of a board with symmetry t
+            self.to_canonical = np.array([p + pass_action for p in getGeometry(n).symmetries])
+            self.from_canonical = np.argsort(self.to_canonical, axis=1)
+
+        self.debug = getattr(args, 'debug', False)
+        self.Boards_s = {} # stores bitboards for each state, debug mode only
+
+        self.collect_stats = getattr(args, 'mcts_stats', False)
+        self.stats = None
+        self.last_stats = None
+        self.total_stats = SearchStats()
+        self.last_sims = 0
+        self.last_seconds = 0.0
+
+        self.endgame_empties = getattr(args, 'endgame_empties', 0)
+        self.endgame = EndgameSolver(game.n) if self.endgame_empties else None
+        self.solutions = {}
+
+        self.threads = getattr(args, 'mcts_threads', 1)
+
+    def __getstate__(self) -> dict:
+        # the tree stays behind when a search is sent to another process
+        state = self.__dict__.copy()
+        state['nodes'] = {}
+        state['Boards_s'] = {}
+        state['root'] = None
+        state['cache'] = None
+        state['solutions'] = {}
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self.cache = getEvaluationCache(getattr(self.args, 'eval_cache_size', 0))
+
+    def clear(self) -> None:
+        """
+        Drops the whole search tree.
+        """
+        self.nodes = {}
+        self.Boards_s = {}
+        self.root = None
+        self.solutions = {}
+
+    def stateKey(self, canonical_board: Board) -> int:
+        """
+        Returns the key of a state, checking it for collisions in debug mode.
+
+        Args:
+            canonical_board (Board): The current state of the board.
+
+        Returns:
+            int: The Zobrist key of the board, or of its symmetry-canonical representative.
+        """
+        if self.symmetric:
+            state, symmetry = canonical_board.canonicalSymmetry()
+        else:
+            state, symmetry = canonical_board.key, 0
+        if self.debug:
+            board = canonical_board.transform(symmetry)
+            pieces = (board.black, board.white)
+            if self.Boards_s.setdefault(state, pieces) != pieces:
+                raise RuntimeError("Zobrist key collision on state {:#x}".format(state))
+        return state
+
+    def symmetryOf(self, canonical_board: Board) -> int:
+        """
+        Returns the symmetry mapping a board onto the representative its node is stored under.
 
-        self.Ended_s = {}  # stores if state is terminal
-        self.Valids_s = {} # stores valid moves for each state
+        Args:
+            canonical_board (Board): The board.
+
+        Returns:
+            int: The index of the symmetry, always 0 without `symmetric`.
+        """
+        return canonical_board.canonicalSymmetry()[1] if self.symmetric else 0
 
-    def simulate(self, canonical_board: Board) -> list[float]:
+    def simulate(self, canonical_board: Board, max_sims: int = None, seconds: float = None, early_stop: bool = False) -> list[float]:
         """
         Perform Monte Carlo Tree Search simulation.
 
+        Without a budget, runs `args.num_sims` simulations. Otherwise runs until `max_sims` simulations
+        or `seconds` of search, whichever comes first. With `early_stop`, the search also stops once the
+        most visited move of the root cannot be overtaken in the simulations left, estimated from the
+        simulation rate so far under a time budget.
+
+        With `args.mcts_batch_size` above 1, leaves are collected under virtual loss and evaluated in batches.
+        With `threads` above 1, the tree is searched by that many threads (see `searchParallel`).
+        With `collect_stats`, the statistics of the call are passed to the registered stats hooks.
+
         Args:
             canonical_board (Board): The current state of the board.
+            max_sims (int): The maximum number of simulations, unlimited if only `seconds` is given.
+            seconds (float): The time budget of the search.
+            early_stop (bool): Whether to stop once the most visited move is decided.
 
         Returns:
             list[float]: The probabilities of selecting each action.
         """
-        for _ in range(self.args.num_sims):
-            self.search(canonical_board)
+        batch_size = getattr(self.args, 'mcts_batch_size', 1)
+        if max_sims is None and seconds is None:
+            max_sims = self.args.num_sims
+
+        start = time.perf_counter()
+        self.last_sims = 0
+        self.last_seconds = 0.0
+
+        if self.solve(canonical_board) is not None:
+            # no search needed, the endgame solver plays
+            return self.policy(canonical_board)
+
+        if self.collect_stats:
+            self.stats = SearchStats()
+
+        self.root = self.stateKey(canonical_board)
+        deadline = start + seconds if seconds is not None else None
+
+        # the root is expanded with one evaluation, every simulation then goes through at least one edge
+        if self.root not in self.nodes:
+            _, state, board, value = self.selectLeaf(canonical_board)
+            if value is None:
+                self.expand(state, board)
+
+        if self.nodes[self.root].ended != 0:
+            # nothing to search from a finished game
+            sims = 0
+        elif self.threads > 1:
+            sims = self.searchParallel(canonical_board, start, max_sims, deadline, early_stop)
+        else:
+            sims = 0
+            while not self.budgetSpent(sims, start, max_sims, deadline, early_stop):
+                if batch_size > 1:
+                    sims += self.searchBatch(canonical_board, batch_size if max_sims is None else min(batch_size, max_sims - sims))
+                else:
+                    self.search(canonical_board)
+                    sims += 1
+
+        self.last_sims = sims
+        self.last_seconds = time.perf_counter() - start
+        if self.collect_stats:
+            self.finishStats(self.last_seconds, sims)
+
+        return self.policy(canonical_board)
+
+    def budgetSpent(self, sims: int, start: float, max_sims: int, deadline: float, early_stop: bool) -> bool:
+        """
+        Checks whether a search has to stop, always letting it run one simulation.
+
+        Args:
+            sims (int): The simulations run so far.
+            start (float): The `time.perf_counter` time the search started at.
+            max_sims (int): The maximum number of simulations, None if unlimited.
+            deadline (float): The `time.perf_counter` time the search has to stop at, None if unlimited.
+            early_stop (bool): Whether to stop once the most visited move is decided.
+
+        Returns:
+            bool: True if the search is over.
+        """
+        if max_sims is not None and sims >= max_sims:
+            return True
+        if sims == 0 or (deadline is None and not early_stop):
+            return False
+        now = time.perf_counter()
+        if deadline is not None and now >= deadline:
+            return True
+        if early_stop:
+            remaining = max_sims - sims if max_sims is not None else math.inf
+            if deadline is not None:
+                remaining = min(remaining, sims * (deadline - now) / max(now - start, EPS))
+            return self.isDecided(remaining)
+        return False
+
+    def isDecided(self, remaining: float) -> bool:
+        """
+        Checks whether the most visited move of the root keeps the lead whatever the next simulations visit.
+
+        Args:
+            remaining (float): The number of simulations left.
+
+        Returns:
+            bool: True if the second most visited move cannot catch up with the first.
+        """
+        node = self.nodes.get(self.root)
+        if node is None or node.N is None:
+            return False
+        if node.valids.sum() < 2:
+            return True
+        second, first = np.partition(node.N, -2)[-2:]
+        return first - second > remaining
+
+    def finishStats(self, seconds: float, sims: int) -> None:
+        """
+        Completes the statistics of a `simulate` call, adds them to the totals and passes them to the stats hooks.
+
+        Args:
+            seconds (float): The duration of the call.
+            sims (int): The number of simulations of the call.
+        """
+        stats = self.stats
+        self.stats = None
+        stats.searches = 1
+        stats.simulations = sims
+        stats.seconds = seconds
+        stats.nodes = len(self.nodes)
+        stats.approx_bytes = stats.nodes * Node.approxBytes(self.game.getActionSize())
+        self.last_stats = stats
+        self.total_stats.merge(stats)
+        for hook in statsHooks():
+            hook(self, stats)
+
+    def policy(self, canonical_board: Board) -> list[float]:
+        """
+        Returns the visit distribution over the actions of a searched board.
+
+        Args:
+            canonical_board (Board): The board.
+
+        Returns:
+            list[float]: The probabilities of selecting each action, all on the solver's move for a solved board.
+        """
+        action_size = self.game.getActionSize()
 
-        state = str(canonical_board.pieces)
+        solved = self.solve(canonical_board)
+        if solved is not None:
+            pi = [0.] * action_size
+            pi[solved[1]] = 1.
+            return pi
 
-        counts = [self.N_sa[(state, action)] if (state, action) in self.N_sa else 0 for action in range(self.game.getActionSize())]
-        
-        counts_sum = float(sum(counts))
+        node = self.nodes.get(self.stateKey(canonical_board))
 
-        if counts_sum == 0:
-            return [1. / len(counts) for _ in counts] # if all counts are zero, return uniform distribution
-        
-        probabilities = [count / counts_sum for count in counts]
+        if node is None or node.N is None or node.N.sum() == 0:
+            # if all counts are zero, return the uniform distribution over the valid moves
+            valids = np.array(self.game.getValidMoves(canonical_board, 1), dtype=np.float64)
+            return (valids / valids.sum()).tolist()
 
-        return probabilities
+        counts = node.N
+        if self.symmetric:
+            counts = counts[self.to_canonical[self.symmetryOf(canonical_board)]]
+
+        return (counts / float(counts.sum())).tolist()
 
     def search(self, canonical_board: Board) -> float:
         """
-        Perform the MCTS search.
+        Perform one MCTS search: select down to a leaf, expand it and back up its value.
 
         Args:
             canonical_board (Board): The current state of the board.
 
         Returns:
-            float: The value of the current state.
+            float: The value of the current state, from the perspective of the previous player.
         """
-        state = str(canonical_board.pieces)
-
-        if state not in self.Ended_s:
-            self.Ended_s[state] = self.game.hasGameEnded(canonical_board, 1)
+        path, state, board, value = self.selectLeaf(canonical_board)
+        if self.stats is not None:
+            self.stats.recordLeaf(len(path), value is not None)
 
-        if self.Ended_s[state] != 0:
-            # terminal node
-            return -self.Ended_s[state]
-        
-        if state not in self.P_s:
+        if value is None:
             # leaf node
-            self.P_s[state], value = self.model.predict(canonical_board)
+            _, value = self.expand(state, board)
+            value = -value
 
-            self.Valids_s[state] = self.game.getValidMoves(canonical_board, 1)
-            self.P_s[state] = self.P_s[state] * self.Valids_s[state]
+        return self.backup(path, value)
 
-            if np.sum(self.P_s[state]) > 0:
-                self.P_s[state] /= np.sum(self.P_s[state])
+    def searchBatch(self, canonical_board: Board, batch_size: int) -> int:
+        """
+        Perform several MCTS searches whose leaves are evaluated with one batched forward pass.
+
+        Each descent adds `args.virtual_loss` virtual visits to the edges it takes so the following
+        descents spread over other branches. Descents reaching the same leaf share its evaluation.
+
+        Args:
+            canonical_board (Board): The current state of the board.
+            batch_size (int): The number of searches.
+
+        Returns:
+            int: The number of searches performed, only counting those that went through at least one edge.
+        """
+        virtual_loss = getattr(self.args, 'virtual_loss', 1.0)
+
+        sims = 0
+        leaves = {}   # stores the board and the pending paths of each leaf
+        for _ in range(batch_size):
+            path, state, board, value = self.selectLeaf(canonical_board, virtual_loss)
+            sims += len(path) > 0
+            if self.stats is not None:
+                self.stats.recordLeaf(len(path), value is not None)
+            if value is None:
+                leaves.setdefault(state, (board, []))[1].append(path)
             else:
-                # some error
-                self.P_s[state] += self.Valids_s[state]
-                self.P_s[state] /= np.sum(self.P_s[state])
+                # terminal node
+                self.backup(path, value, virtual_loss)
 
-            self.N_s[state] = 0
+        if leaves:
+            states = list(leaves)
+            evaluations = self.evaluateBatch(states, [leaves[state][0] for state in states])
+            for state, (pi, value) in zip(states, evaluations):
+                board, paths = leaves[state]
+                self.addNode(state, board, pi)
+                for path in paths:
+                    self.backup(path, -float(value), virtual_loss)
 
-            return -value
-        
-        action = self.bestMove(state)
+        return sims
 
-        next_state_board, next_player = self.game.nextState(canonical_board, 1, action)
-        next_state_board = self.game.getCanonicalForm(next_state_board, next_player)
+    def searchParallel(self, canonical_board: Board, start: float, max_sims: int, deadline: float, early_stop: bool) -> int:
+        """
+        Perform MCTS searches from `threads` threads sharing the tree, until the budget is spent.
 
-        # expand
-        value = self.search(next_state_board)
+        Descents, expansions and backups run under one tree lock, and each descent adds `args.virtual_loss`
+        virtual visits to the edges it takes so that concurrent descents spread over other branches.
+        Leaf evaluations run outside the lock, so that forward passes (which release the GIL) overlap,
+        serialized by a lock of their own for evaluators with `thread_safe` set to False. A descent reaching
+        a leaf that another thread is evaluating waits for that evaluation.
 
-        # backpropagate value from child nodes, i.e., update
-        if (state, action) in self.Q_sa:
-            self.Q_sa[(state, action)] = (self.N_sa[(state, action)] * self.Q_sa[(state, action)] + value) / (self.N_sa[(state, action)] + 1)
-            self.N_sa[(state, action)] += 1
+        Args:
+            canonical_board (Board): The current state of the board.
+            start (float): The `time.perf_counter` time the search started at.
+            max_sims (int): The maximum number of simulations, None if unlimited.
+            deadline (float): The `time.perf_counter` time the search has to stop at, None if unlimited.
+            early_stop (bool): Whether to stop once the most visited move is decided.
+
+        Returns:
+            int: The number of searches performed.
+        """
+        virtual_loss = getattr(self.args, 'virtual_loss', 1.0)
+        version = getattr(self.model, 'version', None)
+        use_cache = self.cache is not None and version is not None
+
+        tree_lock = threading.Lock()
+        model_lock = contextlib.nullcontext() if getattr(self.model, 'thread_safe', True) else threading.Lock()
+        pending = {}        # event of each leaf being evaluated
+        evaluations = {}    # evaluation of each leaf, for the descents that waited for it
+        started = 0
+        failed = False
+
+        def searchThread():
+            nonlocal started, failed
+            while True:
+                with tree_lock:
+                    if failed or self.budgetSpent(started, start, max_sims, deadline, early_stop):
+                        return
+                    started += 1
+                    path, state, board, value = self.selectLeaf(canonical_board, virtual_loss)
+                    if self.stats is not None:
+                        self.stats.recordLeaf(len(path), value is not None)
+                    if value is not None:
+                        # terminal node
+                        self.backup(path, value, virtual_loss)
+                        continue
+
+                    lookup = use_cache and state not in pending
+                    evaluation = self.cache.get((version, state)) if lookup else None
+                    if lookup and self.stats is not None:
+                        self.stats.cache_hits += evaluation is not None
+                        self.stats.cache_misses += evaluation is None
+                    if evaluation is not None:
+                        self.addNode(state, board, evaluation[0])
+                        self.backup(path, -float(evaluation[1]), virtual_loss)
+                        continue
+
+                    event = pending.get(state)
+                    owner = event is None
+                    if owner:
+                        event = pending[state] = threading.Event()
+
+                if not owner:
+                    event.wait()
+                    with tree_lock:
+                        evaluation = evaluations.get(state)
+                        if evaluation is None:
+                            # the evaluating thread failed
+                            self.removeVirtualLoss(path, virtual_loss)
+                            return
+                        self.backup(path, -float(evaluation[1]), virtual_loss)
+                    continue
+
+                try:
+                    with model_lock:
+                        evaluation_start = time.perf_counter()
+                        evaluation = self.model.predict(board)
+                        seconds = time.perf_counter() - evaluation_start
+                except BaseException:
+                    with tree_lock:
+                        failed = True
+                        del pending[state]
+                        self.removeVirtualLoss(path, virtual_loss)
+                    event.set()
+                    raise
+
+                with tree_lock:
+                    if self.stats is not None:
+                        self.stats.recordEvaluation(1, seconds)
+                    if use_cache:
+                        self.cache.put((version, state), evaluation)
+                    self.addNode(state, board, evaluation[0])
+                    evaluations[state] = evaluation
+                    del pending[state]
+                    self.backup(path, -float(evaluation[1]), virtual_loss)
+                event.set()
+
+        with ThreadPoolExecutor(self.threads) as pool:
+            futures = [pool.submit(searchThread) for _ in range(self.threads)]
+        for future in futures:
+            future.result()
+        return started
+
+    def selectLeaf(self, canonical_board: Board, virtual_loss: float = 0) -> tuple[list[tuple[Node, int]], int, Board, float]:
+        """
+        Descend the tree along the best moves until reaching a terminal state or a state that is not expanded.
+
+        Args:
+            canonical_board (Board): The current state of the board.
+            virtual_loss (float): Virtual visits to add to every edge taken.
+
+        Returns:
+            tuple: The path of (node, action) pairs, the key and board of the leaf (mapped onto its
+            representative with `symmetric`), and the value of a terminal leaf from the perspective
+            of the player who moved into it (None for a leaf to evaluate).
+        """
+        path = []   # (node, action) pairs from the root to the leaf
+        board = canonical_board
+        self.generation += 1
+
+        while True:
+            state = self.stateKey(board)
+            node = self.nodes.get(state)
+
+            if node is not None:
+                node.visited = self.generation
+            else:
+                ended = self.game.hasGameEnded(board, 1)
+                if ended == 0:
+                    solved = self.solve(board)
+                    if solved is None:
+                        return path, state, board.transform(self.symmetryOf(board)), None
+                    # backed up like a terminal state with the solved result, 2 for a draw as in `Game.hasGameEnded`
+                    ended = solved[0] or 2
+                    if self.stats is not None:
+                        self.stats.solved += 1
+                node = self.nodes[state] = Node(ended)
+                node.visited = self.generation
+
+            if node.ended != 0:
+                # terminal node, a draw is worth 0
+                return path, state, board, 0 if node.ended == 2 else -node.ended
+
+            action = self.bestMove(node)
+            path.append((node, action))
+            if virtual_loss:
+                node.addVirtualLoss(action, virtual_loss)
+
+            child = node.children.get(action)
+            if child is None:
+                move = self.from_canonical[self.symmetryOf(board)][action] if self.symmetric else action
+                child, next_player = self.game.nextState(board, 1, int(move))
+                child = node.children[action] = self.game.getCanonicalForm(child, next_player)
+            board = child
+
+    def solve(self, canonical_board: Board) -> tuple[int, int] | None:
+        """
+        Solve a board with the endgame solver if at most `endgame_empties` of its squares are empty.
+
+        Solutions are kept until the next `reroot`, so that the root is solved once per move.
+
+        Args:
+            canonical_board (Board): The board.
+
+        Returns:
+            tuple[int, int] | None: The result for the player to move under perfect play (1 for a win,
+            -1 for a loss, 0 for a draw) and the best action; None if the board is not solved.
+        """
+        if self.endgame is None or self.endgame.empties(canonical_board) > self.endgame_empties:
+            return None
+        solution = self.solutions.get(canonical_board.key)
+        if solution is None:
+            value, action = self.endgame.solve(canonical_board)
+            solution = self.solutions[canonical_board.key] = ((value > 0) - (value < 0), action)
+        return solution
+
+    def expand(self, state: int, canonical_board: Board) -> tuple[Node, float]:
+        """
+        Evaluate a leaf with the neural network and add it to the tree.
+
+        Args:
+            state (int): The key of the leaf.
+            canonical_board (Board): The board of the leaf.
+
+        Returns:
+            tuple[Node, float]: The new node and the value predicted for the player to move.
+        """
+        pi, value = self.evaluate(state, canonical_board)
+        return self.addNode(state, canonical_board, pi), value
+
+    def evaluate(self, state: int, canonical_board: Board) -> tuple[np.ndarray, float]:
+        """
+        Evaluate a state with the neural network, going through the shared evaluation cache.
+
+        Args:
+            state (int): The key of the state.
+            canonical_board (Board): The board of the state.
+
+        Returns:
+            tuple[np.ndarray, float]: The policy and the value for the player to move.
+        """
+        version = getattr(self.model, 'version', None)
+        if self.cache is None or version is None:
+            return self.predict(canonical_board)
+
+        key = (version, state)
+        evaluation = self.cache.get(key)
+        if self.stats is not None:
+            self.stats.cache_hits += evaluation is not None
+            self.stats.cache_misses += evaluation is None
+        if evaluation is None:
+            evaluation = self.predict(canonical_board)
+            self.cache.put(key, evaluation)
+        return evaluation
+
+    def evaluateBatch(self, states: list[int], boards: list[Board]) -> list[tuple[np.ndarray, float]]:
+        """
+        Evaluate several states, sending the ones missing from the evaluation cache through one forward pass.
+
+        Args:
+            states (list[int]): The keys of the states.
+            boards (list[Board]): The boards of the states.
+
+        Returns:
+            list[tuple[np.ndarray, float]]: The policy and value of each state.
+        """
+        version = getattr(self.model, 'version', None)
+        if self.cache is None or version is None:
+            return list(zip(*self.predictBatch(boards)))
+
+        evaluations = [self.cache.get((version, state)) for state in states]
+        missing = [i for i, evaluation in enumerate(evaluations) if evaluation is None]
+        if self.stats is not None:
+            self.stats.cache_hits += len(states) - len(missing)
+            self.stats.cache_misses += len(missing)
+        if missing:
+            pis, values = self.predictBatch([boards[i] for i in missing])
+            for i, pi, value in zip(missing, pis, values):
+                evaluations[i] = (pi, float(value))
+                self.cache.put((version, states[i]), evaluations[i])
+        return evaluations
+
+    def predict(self, canonical_board: Board) -> tuple[np.ndarray, float]:
+        """
+        Evaluate a board with the neural network, timing the call when recording statistics.
+
+        Args:
+            canonical_board (Board): The board.
+
+        Returns:
+            tuple[np.ndarray, float]: The policy and the value for the player to move.
+        """
+        if self.stats is None:
+            return self.model.predict(canonical_board)
+        start = time.perf_counter()
+        evaluation = self.model.predict(canonical_board)
+        self.stats.recordEvaluation(1, time.perf_counter() - start)
+        return evaluation
+
+    def predictBatch(self, boards: list[Board]) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Evaluate boards with one forward pass, timing the call when recording statistics.
+
+        Args:
+            boards (list[Board]): The boards.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: The policies and the values.
+        """
+        if self.stats is None:
+            return self.model.predictBatch(boards)
+        start = time.perf_counter()
+        evaluations = self.model.predictBatch(boards)
+        self.stats.recordEvaluation(len(boards), time.perf_counter() - start)
+        return evaluations
+
+    def addNode(self, state: int, canonical_board: Board, pi: np.ndarray) -> Node:
+        """
+        Add an expanded node with the policy masked to the valid moves.
+
+        Args:
+            state (int): The key of the state.
+            canonical_board (Board): The board of the state.
+            pi (np.ndarray): The policy predicted by the neural network.
+
+        Returns:
+            Node: The new node.
+        """
+        valids = np.array(self.game.getValidMoves(canonical_board, 1), dtype=bool)
+        P = np.asarray(pi, dtype=np.float64) * valids
+
+        if np.sum(P) > 0:
+            P /= np.sum(P)
         else:
-            self.Q_sa[(state, action)] = value
-            self.N_sa[(state, action)] = 1
+            # some error
+            P += valids
+            P /= np.sum(P)
+
+        node = self.nodes[state] = Node(0, P, valids)
+        # a leaf is as recent as the descent that reached it, so the next ones do not evaluate it again
+        node.visited = self.generation
+        if self.stats is not None:
+            self.stats.expansions += 1
+
+        if self.max_nodes and len(self.nodes) > self.max_nodes:
+            self.evict()
+
+        return node
+
+    def reroot(self, canonical_board: Board) -> None:
+        """
+        Make a board the root of the tree, keeping the statistics of its subtree and releasing every other node.
 
-        return -value
-    
-    def bestMove(self, state: str) -> int:
+        Args:
+            canonical_board (Board): The board the next simulation will start from.
+        """
+        self.root = self.stateKey(canonical_board)
+        self.solutions = {}
+
+        kept = {}
+        stack = [self.root]
+        while stack:
+            state = stack.pop()
+            if state in kept or state not in self.nodes:
+                continue
+            node = kept[state] = self.nodes[state]
+            stack.extend(self.stateKey(child) for child in node.children.values())
+
+        self.nodes = kept
+        if self.debug:
+            self.Boards_s = {state: self.Boards_s[state] for state in kept}
+
+    def evict(self) -> None:
+        """
+        Evict the nodes reached longest ago until the tree is a tenth below `max_nodes`, along with their
+        bitboards in debug mode. The root is never evicted.
+        """
+        target = max(1, self.max_nodes - self.max_nodes // 10)
+        states = [state for state in self.nodes if state != self.root]
+        excess = len(self.nodes) - target
+        if excess <= 0 or not states:
+            return
+
+        visited = np.fromiter((self.nodes[state].visited for state in states), dtype=np.int64, count=len(states))
+        for i in np.argpartition(visited, min(excess, len(states)) - 1)[:excess]:
+            del self.nodes[states[i]]
+            if self.debug:
+                self.Boards_s.pop(states[i], None)
+
+    def backup(self, path: list[tuple[Node, int]], value: float, virtual_loss: float = 0) -> float:
+        """
+        Backpropagate a leaf value along the path of a search, i.e., update the edges from the leaf up.
+
+        Args:
+            path (list[tuple[Node, int]]): The (node, action) pairs from the root to the leaf.
+            value (float): The value of the leaf, from the perspective of the player who moved into it.
+            virtual_loss (float): Virtual visits the search added to every edge, removed here.
+
+        Returns:
+            float: The value of the root, from the perspective of the previous player.
+        """
+        for node, action in reversed(path):
+            if virtual_loss:
+                node.addVirtualLoss(action, -virtual_loss)
+            n = node.N[action]
+            node.Q[action] = (n * node.Q[action] + value) / (n + 1)
+            node.N[action] = n + 1
+            node.N_s += 1
+            value = -value
+        return value
+
+    def removeVirtualLoss(self, path: list[tuple[Node, int]], virtual_loss: float) -> None:
+        """
+        Remove the virtual visits of a search that will not back up a value.
+
+        Args:
+            path (list[tuple[Node, int]]): The (node, action) pairs from the root to the leaf.
+            virtual_loss (float): Virtual visits the search added to every edge.
+        """
+        for node, action in path:
+            node.addVirtualLoss(action, -virtual_loss)
+
+    def bestMove(self, node: Node) -> int:
         """
         Find the best move to make based on the current state.
 
         Args:
-            state (str): The current state of the board.
+            node (Node): The node of the current state.
 
         Returns:
-            int: The best action to take.
+            int: The action with the highest upper confidence bound.
         """
-        valid_moves = self.Valids_s[state]
-        best_u = -float('inf')
-        best_action = -1 # no valid moves, by default
+        N, Q, N_s = node.statistics()
 
-        # search
-        for action in range(self.game.getActionSize()):
-            if valid_moves[action]:
-                # upper confidence bound
-                if (state, action) in self.Q_sa:
-                    u = self.Q_sa[(state, action)] + self.args.c_puct * self.P_s[state][action] * math.sqrt(self.N_s[state]) / (1 + self.N_sa[(state, action)])
-                else:
-                    u = self.args.c_puct * self.P_s[state][action] * math.sqrt(self.N_s[state] + EPS)
-                if u > best_u:
-                    best_u = u
-                    best_action = action
-        return best_action
+        # unvisited edges have Q = 0 and N = 0, so one expression covers both cases
+        sqrt_n = math.sqrt(N_s) if N_s else math.sqrt(EPS)
+        u = Q + self.args.c_puct * node.P * sqrt_n / (1 + N) + node.bias
 
+        return int(u.argmax())
\ No newline at end of file
@@ -0,0 +1,91 @@
+import numpy as np
+
+class Node:
+    """
+    Statistics of one state in the search tree, stored as contiguous arrays indexed by action.
+
+    Attributes:
+        ended (int): Result of the state as returned by `Game.hasGameEnded` or solved by the endgame solver, 0 if it is not terminal.
+        P (np.ndarray): Policy (probabilities) returned by the neural network, masked to the valid moves.
+        N (np.ndarray): Number of times each edge (s, a) was visited.
+        Q (np.ndarray): Q value of each edge (s, a).
+        valids (np.ndarray): Boolean mask of the valid moves.
+        bias (np.ndarray): 0 for valid moves and -inf for invalid ones, added to the upper confidence bounds.
+        N_s (int): Number of times the state was visited.
+        children (dict): Canonical board reached by each explored action.
+        VL (np.ndarray): Virtual visits of each edge from searches still waiting for their leaf evaluation, None until first used.
+        pending (float): Total virtual visits of the node.
+        visited (int): The descent (`MCTS.generation`) that last reached the node, to evict the least recently used nodes first.
+
+    Terminal nodes only carry `ended`; their arrays are None.
+    """
+
+    __slots__ = ('ended', 'P', 'N', 'Q', 'valids', 'bias', 'N_s', 'children', 'VL', 'pending', 'visited')
+
+    def __init__(self, ended: int, P: np.ndarray = None, valids: np.ndarray = None) -> None:
+        """
+        Initializes a node.
+
+        Args:
+            ended (int): Result of the state, 0 if it is not terminal.
+            P (np.ndarray): Masked and normalized policy of an expanded state.
+            valids (np.ndarray): Boolean mask of the valid moves of an expanded state.
+        """
+        self.ended = ended
+        self.P = P
+        self.valids = valids
+        self.N_s = 0
+        self.children = {}
+        self.VL = None
+        self.pending = 0.0
+        self.visited = 0
+        if P is None:
+            self.N = self.Q = self.bias = None
+        else:
+            self.N = np.zeros(len(P), dtype=np.float64)
+            self.Q = np.zeros(len(P), dtype=np.float64)
+            self.bias = np.where(valids, 0.0, -np.inf)
+
+    @staticmethod
+    def approxBytes(action_size: int) -> int:
+        """
+        Estimates the memory held by an expanded node, including its dict entry and one cached child board.
+
+        Args:
+            action_size (int): The number of actions.
+
+        Returns:
+            int: The approximate size in bytes.
+        """
+        # five float/bool arrays with their headers, plus the node, children dict and child board objects
+        return 5 * (112 + 8 * action_size) + 1000
+
+    def addVirtualLoss(self, action: int, amount: float) -> None:
+        """
+        Add virtual visits to an edge, each counted as a loss, to steer concurrent searches elsewhere.
+
+        Args:
+            action (int): The action of the edge.
+            amount (float): The number of virtual visits, negative to remove them.
+        """
+        if self.VL is None:
+            self.VL = np.zeros(len(self.P), dtype=np.float64)
+        self.VL[action] += amount
+        self.pending += amount
+        if abs(self.pending) < 1e-9:
+            # all searches returned, drop rounding residue
+            self.pending = 0.0
+            self.VL[:] = 0.0
+
+    def statistics(self) -> tuple[np.ndarray, np.ndarray, float]:
+        """
+        Returns the visit counts, Q values and state visit count including pending virtual losses.
+
+        Returns:
+            tuple: The effective N, Q and N_s.
+        """
+        if not self.pending:
+            return self.N, self.Q, self.N_s
+        N = self.N + self.VL
+        Q = (self.N * self.Q - self.VL) / np.maximum(N, 1)
+        return N, Q, self.N_s + self.pending
\ No newline at end of file
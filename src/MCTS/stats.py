@@ -0,0 +1,159 @@
+class SearchStats:
+    """
+    Counters of MCTS searches, for one `simulate` call or accumulated over many.
+
+    Attributes:
+        searches (int): The number of `simulate` calls counted.
+        simulations (int): The number of simulations.
+        seconds (float): The wall time of the searches.
+        nn_calls (int): The number of forward passes of the network.
+        nn_positions (int): The number of positions evaluated by the network.
+        nn_seconds (float): The time spent in the network, the rest going to tree operations.
+        cache_hits (int): The evaluations answered by the shared evaluation cache.
+        cache_misses (int): The evaluations the cache could not answer.
+        terminal_hits (int): The simulations ending on a terminal state, solved ones included.
+        solved (int): The leaves solved by the endgame solver instead of evaluated.
+        expansions (int): The nodes added to the tree.
+        depth_sum (int): The sum of the depths of the leaves reached.
+        max_depth (int): The deepest leaf reached.
+        nodes (int): The number of nodes in the tree after the search, the largest one when accumulated.
+        approx_bytes (int): The approximate memory of those nodes.
+    """
+
+    COUNTERS = ('searches', 'simulations', 'seconds', 'nn_calls', 'nn_positions', 'nn_seconds', 'cache_hits',
+                'cache_misses', 'terminal_hits', 'solved', 'expansions', 'depth_sum')
+    PEAKS = ('max_depth', 'nodes', 'approx_bytes')
+
+    def __init__(self) -> None:
+        """
+        Initializes zeroed counters.
+        """
+        for name in self.COUNTERS + self.PEAKS:
+            setattr(self, name, 0)
+        self.seconds = 0.0
+        self.nn_seconds = 0.0
+
+    def recordLeaf(self, depth: int, terminal: bool) -> None:
+        """
+        Counts the leaf reached by one simulation.
+
+        Args:
+            depth (int): The number of moves from the root to the leaf.
+            terminal (bool): Whether the leaf is a terminal state.
+        """
+        self.depth_sum += depth
+        if depth > self.max_depth:
+            self.max_depth = depth
+        if terminal:
+            self.terminal_hits += 1
+
+    def recordEvaluation(self, positions: int, seconds: float) -> None:
+        """
+        Counts one forward pass of the network.
+
+        Args:
+            positions (int): The number of positions evaluated.
+            seconds (float): The time it took.
+        """
+        self.nn_calls += 1
+        self.nn_positions += positions
+        self.nn_seconds += seconds
+
+    def merge(self, other: 'SearchStats') -> None:
+        """
+        Adds the counters of other searches, keeping the peaks.
+
+        Args:
+            other (SearchStats): The statistics to add.
+        """
+        for name in self.COUNTERS:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        for name in self.PEAKS:
+            setattr(self, name, max(getattr(self, name), getattr(other, name)))
+
+    def simsPerSec(self) -> float:
+        return self.simulations / self.seconds if self.seconds else 0.0
+
+    def meanDepth(self) -> float:
+        return self.depth_sum / self.simulations if self.simulations else 0.0
+
+    def cacheHitRate(self) -> float:
+        lookups = self.cache_hits + self.cache_misses
+        return self.cache_hits / lookups if lookups else 0.0
+
+    def asDict(self) -> dict:
+        """
+        Returns the counters and the derived rates, for logging.
+
+        Returns:
+            dict: The statistics by name.
+        """
+        stats = {name: getattr(self, name) for name in self.COUNTERS + self.PEAKS}
+        stats.update(sims_per_sec=self.simsPerSec(), mean_depth=self.meanDepth(), cache_hit_rate=self.cacheHitRate(),
+                     tree_seconds=self.seconds - self.nn_seconds)
+        return stats
+
+    def __str__(self) -> str:
+        return ("{simulations} sims in {seconds:.2f}s ({sims_per_sec:.0f} sims/s, {nn_seconds:.2f}s in the network), "
+                "{nn_calls} NN calls for {nn_positions} positions, cache hit rate {cache_hit_rate:.1%}, "
+                "{terminal_hits} terminal hits ({solved} solved), depth {mean_depth:.1f} mean / {max_depth} max, "
+                "{nodes} nodes (~{approx_bytes:,} bytes)").format(**self.asDict())
+
+class StatsCollector:
+    """
+    Stats hook accumulating the statistics of every search, in total and per MCTS instance.
+
+    Attributes:
+        total (SearchStats): The statistics of all searches.
+        searches (dict): The statistics of each MCTS instance, by `id`.
+    """
+
+    def __init__(self) -> None:
+        self.total = SearchStats()
+        self.searches = {}
+
+    def __call__(self, mcts, stats: SearchStats) -> None:
+        self.total.merge(stats)
+        self.searches.setdefault(id(mcts), SearchStats()).merge(stats)
+
+    def of(self, mcts) -> SearchStats:
+        """
+        Returns the statistics collected from one MCTS instance.
+
+        Args:
+            mcts (MCTS): The search.
+
+        Returns:
+            SearchStats: Its statistics, zero if it did not search.
+        """
+        return self.searches.get(id(mcts), SearchStats())
+
+_hooks = []
+
+def addStatsHook(hook) -> None:
+    """
+    Registers a function called as `hook(mcts, stats)` after each `simulate` of an MCTS collecting statistics in this process.
+
+    Args:
+        hook: The function.
+    """
+    _hooks.append(hook)
+
+def removeStatsHook(hook) -> None:
+    """
+    Unregisters a function added by `addStatsHook`.
+
+    Args:
+        hook: The function.
+    """
+    if hook in _hooks:
+        _hooks.remove(hook)
+
+def statsHooks() -> list:
+    """
+    Returns the registered stats hooks.
+
+    Returns:
+        list: The hooks, in registration order.
+    """
+    return _hooks
\ No newline at end of file
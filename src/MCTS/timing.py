@@ -0,0 +1,66 @@
+import math
+
+from src.game.board import Board
+
+class TimeManager:
+    """
+    Spreads the clock of a game over the moves a player has left.
+
+    Each move gets the remaining time divided by an estimate of the moves left (half the empty
+    squares, as both players fill them), plus the increment, and never more than `max_share` of
+    the remaining time so that a long think leaves time for the rest of the game.
+
+    Attributes:
+        total (float): The seconds on the clock at the start of a game.
+        increment (float): The seconds added to the clock after each move.
+        max_share (float): The largest share of the remaining time spent on one move.
+        min_moves (int): The smallest number of moves the remaining time is spread over.
+        remaining (float): The seconds left on the clock.
+    """
+
+    def __init__(self, total: float, increment: float = 0.0, max_share: float = 0.5, min_moves: int = 2) -> None:
+        """
+        Initializes a full clock.
+
+        Args:
+            total (float): The seconds on the clock at the start of a game.
+            increment (float): The seconds added to the clock after each move.
+            max_share (float): The largest share of the remaining time spent on one move.
+            min_moves (int): The smallest number of moves the remaining time is spread over.
+        """
+        self.total = total
+        self.increment = increment
+        self.max_share = max_share
+        self.min_moves = min_moves
+        self.remaining = total
+
+    def reset(self) -> None:
+        """
+        Refills the clock for a new game.
+        """
+        self.remaining = self.total
+
+    def budget(self, board: Board) -> float:
+        """
+        Returns the seconds to spend on the next move.
+
+        Args:
+            board (Board): The board of the move.
+
+        Returns:
+            float: The time budget of the move, 0 once the clock has run out.
+        """
+        if self.remaining <= 0:
+            return 0.0
+        empties = board.n * board.n - (board.black | board.white).bit_count()
+        moves_left = max(math.ceil(empties / 2), self.min_moves)
+        return min(self.remaining / moves_left + self.increment, self.remaining * self.max_share)
+
+    def spend(self, seconds: float) -> None:
+        """
+        Charges the time of a move to the clock and adds the increment.
+
+        Args:
+            seconds (float): The time the move took.
+        """
+        self.remaining += self.increment - seconds
\ No newline at end of file
@@ -0,0 +1,199 @@
+from src.game.board import Board
+
+import numpy as np
+
+class BatchGame:
+    """
+    Vectorized counterpart of `Game` working on stacks of boards.
+
+    Boards are int8 arrays of shape (B, n, n) holding 1, -1 and 0 like `Board.pieces`, with one
+    player per board in an array of shape (B,). Every method is computed with array shifts over
+    the whole stack, looping only over the 8 directions and the squares along them.
+    """
+
+    def __init__(self, size: int) -> None:
+        """
+        Initializes a new instance of the BatchGame class.
+
+        Args:
+            size (int): The size of the game board.
+        """
+        self.n = size
+
+    def getInitialBoards(self, count: int) -> np.ndarray:
+        """
+        Gets a stack of initial game boards.
+
+        Args:
+            count (int): The number of boards.
+
+        Returns:
+            np.ndarray: The initial boards, of shape (count, n, n).
+        """
+        board = np.array(Board(self.n).pieces, dtype=np.int8)
+        return np.repeat(board[None], count, axis=0)
+
+    def fromBoards(self, boards: list[Board]) -> np.ndarray:
+        """
+        Stacks `Board` objects into an array.
+
+        Args:
+            boards (list[Board]): The boards.
+
+        Returns:
+            np.ndarray: The boards, of shape (B, n, n).
+        """
+        return np.array([board.pieces for board in boards], dtype=np.int8).reshape(-1, self.n, self.n)
+
+    def toBoards(self, boards: np.ndarray) -> list[Board]:
+        """
+        Converts a stack of boards into `Board` objects.
+
+        Args:
+            boards (np.ndarray): The boards, of shape (B, n, n).
+
+        Returns:
+            list[Board]: The boards.
+        """
+        result = []
+        for pieces in boards:
+            board = Board(self.n)
+            board.pieces = pieces.tolist()
+            result.append(board)
+        return result
+
+    def getActionSize(self) -> int:
+        """
+        Gets the total number of possible actions.
+
+        Returns:
+            int: The total number of possible actions.
+        """
+        return self.n * self.n + 1
+
+    def shift(self, masks: np.ndarray, dx: int, dy: int) -> np.ndarray:
+        """
+        Moves every square of a stack of masks one step in a direction, dropping what leaves the board.
+
+        Args:
+            masks (np.ndarray): The boolean masks, of shape (B, n, n).
+            dx (int): The row step.
+            dy (int): The column step.
+
+        Returns:
+            np.ndarray: The shifted masks.
+        """
+        n = self.n
+        shifted = np.zeros_like(masks)
+        shifted[:, max(dx, 0):n + min(dx, 0), max(dy, 0):n + min(dy, 0)] = \
+            masks[:, max(-dx, 0):n + min(-dx, 0), max(-dy, 0):n + min(-dy, 0)]
+        return shifted
+
+    def legalMoves(self, own: np.ndarray, opp: np.ndarray) -> np.ndarray:
+        """
+        Computes the legal moves of the players owning `own`.
+
+        Args:
+            own (np.ndarray): Boolean masks of the pieces of the players to move, of shape (B, n, n).
+            opp (np.ndarray): Boolean masks of their opponents' pieces.
+
+        Returns:
+            np.ndarray: Boolean masks of the legal moves.
+        """
+        empty = ~(own | opp)
+        moves = np.zeros_like(own)
+        for dx, dy in Board.DIRECTIONS:
+            run = self.shift(own, dx, dy) & opp
+            for _ in range(self.n - 3):
+                run |= self.shift(run, dx, dy) & opp
+            moves |= self.shift(run, dx, dy) & empty
+        return moves
+
+    def getValidMoves(self, boards: np.ndarray, players: np.ndarray) -> np.ndarray:
+        """
+        Gets the valid moves of the player to move on each board.
+
+        Args:
+            boards (np.ndarray): The boards, of shape (B, n, n).
+            players (np.ndarray): The player to move on each board, of shape (B,).
+
+        Returns:
+            np.ndarray: int8 masks of shape (B, n * n + 1), the pass action set when there is no other move.
+        """
+        players = np.asarray(players).reshape(-1, 1, 1)
+        moves = self.legalMoves(boards == players, boards == -players).reshape(len(boards), -1)
+        valids = np.zeros((len(boards), self.getActionSize()), dtype=np.int8)
+        valids[:, :-1] = moves
+        valids[:, -1] = ~moves.any(axis=1)
+        return valids
+
+    def nextState(self, boards: np.ndarray, players: np.ndarray, moves: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Gets the next state of each board after a move is played.
+
+        Passes and invalid moves leave a board unchanged, as `Game.nextState` does.
+
+        Args:
+            boards (np.ndarray): The boards, of shape (B, n, n).
+            players (np.ndarray): The player to move on each board, of shape (B,).
+            moves (np.ndarray): The move played on each board, of shape (B,).
+
+        Returns:
+            (np.ndarray, np.ndarray): The next boards and the next players.
+        """
+        n = self.n
+        players = np.asarray(players)
+        moves = np.asarray(moves)
+        own = boards == players.reshape(-1, 1, 1)
+        opp = boards == -players.reshape(-1, 1, 1)
+
+        played = np.zeros((len(boards), n * n + 1), dtype=bool)
+        played[np.arange(len(boards)), moves] = True
+        played = played[:, :-1].reshape(-1, n, n)
+
+        flips = np.zeros_like(own)
+        for dx, dy in Board.DIRECTIONS:
+            line = np.zeros_like(own)
+            closed = np.zeros(len(boards), dtype=bool)
+            frontier = self.shift(played, dx, dy)
+            for _ in range(n - 1):
+                closed |= (frontier & own).any(axis=(1, 2))
+                frontier = frontier & opp
+                line |= frontier
+                frontier = self.shift(frontier, dx, dy)
+            flips |= line & closed.reshape(-1, 1, 1)
+
+        valid = (flips.any(axis=(1, 2)) & ~(played & (own | opp)).any(axis=(1, 2))).reshape(-1, 1, 1)
+        changed = (flips | played) & valid
+        next_boards = np.where(changed, players.reshape(-1, 1, 1), boards).astype(np.int8)
+        return next_boards, -players
+
+    def getCanonicalForm(self, boards: np.ndarray, players: np.ndarray) -> np.ndarray:
+        """
+        Gets the canonical form of each board for its player.
+
+        Args:
+            boards (np.ndarray): The boards, of shape (B, n, n).
+            players (np.ndarray): The player of each board, of shape (B,).
+
+        Returns:
+            np.ndarray: The canonical boards.
+        """
+        return (boards * np.asarray(players, dtype=np.int8).reshape(-1, 1, 1)).astype(np.int8)
+
+    def hasGameEnded(self, boards: np.ndarray, players: np.ndarray) -> np.ndarray:
+        """
+        Checks which games have ended.
+
+        Args:
+            boards (np.ndarray): The boards, of shape (B, n, n).
+            players (np.ndarray): The current player of each board, of shape (B,).
+
+        Returns:
+            np.ndarray: Per board, 0 if the game has not ended, 1 if the current player has won, -1 if the opponent has won, 2 for a draw.
+        """
+        black, white = boards == 1, boards == -1
+        ongoing = self.legalMoves(black, white).any(axis=(1, 2)) | self.legalMoves(white, black).any(axis=(1, 2))
+        diff = boards.sum(axis=(1, 2), dtype=np.int64) * np.asarray(players)
+        results = np.where(diff > 0, 1, np.where(diff < 0, -1, 2))
+        return np.where(ongoing, 0, results)
\ No newline at end of file
@@ -1,42 +1,298 @@
+import random
+
+class Geometry:
+    """
+    Precomputed bitboard constants for a board size.
+
+    Square (x, y) maps to bit x * n + y, which is also its action index.
+
+    Attributes:
+    - n (int): The size of the board.
+    - full (int): Mask with every square of the board set.
+    - shifts (list[tuple[int, int]]): One (shift, mask) pair per direction. A positive shift moves bits left, a negative one right, and the mask clears squares that wrapped around a board edge.
+    - zobrist_black (list[int]): 64-bit Zobrist code of a player 1 piece on each square.
+    - zobrist_white (list[int]): 64-bit Zobrist code of a player -1 piece on each square.
+    - zobrist_flip (list[int]): Code toggled when the piece on a square changes color.
+    - symmetries (list[list[int]]): The 8 dihedral symmetries as square permutations, symmetries[t][square] being the square it maps to. Symmetry 0 is the identity, the others follow the rotations and flips of `Game.getSymmetries`.
+    - zobrist_black_sym (list[tuple[int, ...]]): For each square, the Zobrist code of a player 1 piece there after each symmetry.
+    - zobrist_white_sym (list[tuple[int, ...]]): For each square, the Zobrist code of a player -1 piece there after each symmetry.
+    """
+
+    def __init__(self, n: int) -> None:
+        """
+        Initializes the bitboard constants for the given board size.
+
+        Args:
+            n (int): The size of the board.
+
+        Returns:
+            None
+        """
+        self.n = n
+        self.full = (1 << (n * n)) - 1
+
+        first_col = sum(1 << (x * n) for x in range(n))
+        last_col = first_col << (n - 1)
+
+        self.shifts = []
+        for dx, dy in Board.DIRECTIONS:
+            mask = self.full
+            if dy == 1:
+                mask &= ~first_col
+            elif dy == -1:
+                mask &= ~last_col
+            self.shifts.append((dx * n + dy, mask))
+
+        # seeded by size so keys are stable across processes and runs
+        rng = random.Random(n)
+        self.zobrist_black = [rng.getrandbits(64) for _ in range(n * n)]
+        self.zobrist_white = [rng.getrandbits(64) for _ in range(n * n)]
+        self.zobrist_flip = [b ^ w for b, w in zip(self.zobrist_black, self.zobrist_white)]
+
+        # rotations by 90 degrees (as np.rot90), each with and without a left-right flip
+        self.symmetries = []
+        for rotations in range(4):
+            for flip in (False, True):
+                permutation = []
+                for square in range(n * n):
+                    x, y = divmod(square, n)
+                    for _ in range(rotations):
+                        x, y = n - 1 - y, x
+                    if flip:
+                        y = n - 1 - y
+                    permutation.append(x * n + y)
+                self.symmetries.append(permutation)
+
+        self.zobrist_black_sym = [tuple(self.zobrist_black[p[square]] for p in self.symmetries) for square in range(n * n)]
+        self.zobrist_white_sym = [tuple(self.zobrist_white[p[square]] for p in self.symmetries) for square in range(n * n)]
+
+    def zobristKey(self, black: int, white: int) -> int:
+        """
+        Computes the Zobrist key of a position from scratch.
+
+        Args:
+            black (int): Bitboard of player 1's pieces.
+            white (int): Bitboard of player -1's pieces.
+
+        Returns:
+            int: The 64-bit Zobrist key.
+        """
+        key = 0
+        for square in iterBits(black):
+            key ^= self.zobrist_black[square]
+        for square in iterBits(white):
+            key ^= self.zobrist_white[square]
+        return key
+
+_GEOMETRIES = {}
+
+def getGeometry(n: int) -> Geometry:
+    """
+    Returns the (cached) bitboard constants for a board size.
+
+    Args:
+        n (int): The size of the board.
+
+    Returns:
+        Geometry: The bitboard constants.
+    """
+    geometry = _GEOMETRIES.get(n)
+    if geometry is None:
+        geometry = _GEOMETRIES[n] = Geometry(n)
+    return geometry
+
+def legalMovesMask(own: int, opp: int, geometry: Geometry) -> int:
+    """
+    Computes the legal moves of a player with shift-and-mask move generation.
+
+    Args:
+        own (int): Bitboard of the player to move.
+        opp (int): Bitboard of the opponent.
+        geometry (Geometry): The bitboard constants of the board size.
+
+    Returns:
+        int: Bitboard with a bit set on every legal move.
+    """
+    steps = geometry.n - 3
+    moves = 0
+    for shift, mask in geometry.shifts:
+        line = mask & opp
+        if shift > 0:
+            run = (own << shift) & line
+            for _ in range(steps):
+                run |= (run << shift) & line
+            moves |= (run << shift) & mask
+        else:
+            shift = -shift
+            run = (own >> shift) & line
+            for _ in range(steps):
+                run |= (run >> shift) & line
+            moves |= (run >> shift) & mask
+    return moves & ~(own | opp) & geometry.full
+
+def flipsMask(square: int, own: int, opp: int, geometry: Geometry) -> int:
+    """
+    Computes the opponent pieces flipped by playing on a square.
+
+    Args:
+        square (int): Bitboard with only the played square set.
+        own (int): Bitboard of the player to move.
+        opp (int): Bitboard of the opponent.
+        geometry (Geometry): The bitboard constants of the board size.
+
+    Returns:
+        int: Bitboard of the flipped pieces, 0 if the move flips nothing.
+    """
+    flips = 0
+    for shift, mask in geometry.shifts:
+        line = 0
+        if shift > 0:
+            x = (square << shift) & mask
+            while x & opp:
+                line |= x
+                x = (x << shift) & mask
+        else:
+            x = (square >> -shift) & mask
+            while x & opp:
+                line |= x
+                x = (x >> -shift) & mask
+        if x & own:
+            flips |= line
+    return flips
+
+def iterBits(mask: int):
+    """
+    Yields the indices of the set bits of a mask in increasing order.
+
+    Args:
+        mask (int): The bitboard.
+
+    Yields:
+        int: The index of a set bit.
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
 class Board:
     """
     Represents the game board for Othello.
 
+    The position is stored as two bitboards, one per player, where square (x, y) is bit x * n + y.
+    Boards are treated as immutable: the legal moves of each player are generated at most once and cached,
+    and the Zobrist keys of the board and of its color-swapped twin are updated incrementally by every move.
+
     Attributes:
     - n (int): The size of the board.
-    - pieces (list[list[int]]): The matrix representing the board state.
+    - black (int): Bitboard of player 1's pieces.
+    - white (int): Bitboard of player -1's pieces.
+    - pieces (list[list[int]]): The matrix representing the board state, built from (and assignable to) the bitboards.
+    - legal_black (int): Cached legal moves of player 1, None until generated.
+    - legal_white (int): Cached legal moves of player -1, None until generated.
+    - key (int): Zobrist key of the position, usable as a compact state key.
+    - swapped_key (int): Zobrist key of the position with the colors exchanged.
+    - symmetry (tuple[int, int]): Cached result of `canonicalSymmetry`, None until computed.
 
     Methods:
-    - __init__(self, size: int) -> None: Initializes the board with the given size.
+    - __init__(self, size: int, black: int = None, white: int = None, key: int = None, swapped_key: int = None) -> None: Initializes the board with the given size.
     - __getitem__(self, key: (int, int)) -> int: Returns the value at the specified position on the board.
     - getBoardSize(self) -> int: Returns the size of the board.
     - diff(self, player: int) -> int: Returns the difference in the number of pieces between the specified color and its opponent.
-    - isValidMove(self, x: int, y: int, dx: int, dy: int, player: int) -> bool: Checks if a move is valid for the specified color at the given position.
+    - isValidMove(self, x: int, y: int, player: int) -> bool: Checks if a move is valid for the specified color at the given position.
+    - getLegalMovesMask(self, player: int) -> int: Returns the (cached) bitboard of legal moves for the specified color.
     - getLegalMoves(self, player: int) -> list[(int, int)]: Returns a list of legal moves for the specified color.
+    - nextBoard(self, move: int, player: int) -> Board: Returns the board after playing the specified move.
+    - swapColors(self) -> Board: Returns the board with the two colors exchanged.
+    - transform(self, symmetry: int) -> Board: Returns the board mapped through one of the 8 symmetries.
+    - canonicalSymmetry(self) -> (int, int): Returns the key of the symmetry-canonical representative and the symmetry reaching it.
     - playMove(self, move: int) -> list[list[int]]: Plays the specified move on the board and returns the updated board state.
     - printBoard(self) -> None: Prints the current board state.
     """
 
     DIRECTIONS = [(0, 1), (1, 0), (0, -1), (-1, 0), (1, 1), (-1, -1), (-1, 1), (1, -1)]
 
-    def __init__(self, size: int) -> None:
+    def __init__(self, size: int, black: int = None, white: int = None, key: int = None, swapped_key: int = None) -> None:
         """
         Initializes a new instance of the Board class.
 
         Args:
             size (int): The size of the board.
+            black (int): Bitboard of player 1's pieces. Defaults to the initial position.
+            white (int): Bitboard of player -1's pieces. Defaults to the initial position.
+            key (int): Zobrist key of the position, computed from the bitboards if not given.
+            swapped_key (int): Zobrist key of the color-swapped position, computed from the bitboards if not given.
 
         Returns:
             None
         """
         self.n = size
+        self.geometry = getGeometry(size)
+
+        if black is None or white is None:
+            a, b = size // 2 - 1, size // 2
+            black = (1 << (a * size + a)) | (1 << (b * size + b))
+            white = (1 << (a * size + b)) | (1 << (b * size + a))
+
+        self.black = black
+        self.white = white
+        self.legal_black = None
+        self.legal_white = None
+
+        if key is None or swapped_key is None:
+            key = self.geometry.zobristKey(black, white)
+            swapped_key = self.geometry.zobristKey(white, black)
+        self.key = key
+        self.swapped_key = swapped_key
+        self.symmetry = None
 
-        self.pieces = [[0] * size for _ in range(size)]
+    def __getstate__(self) -> dict:
+        return {'n': self.n, 'black': self.black, 'white': self.white}
 
-        self.pieces[size // 2 - 1][size // 2 - 1] = 1
-        self.pieces[size // 2][size // 2] = 1
-        self.pieces[size // 2 - 1][size // 2] = -1
-        self.pieces[size // 2][size // 2 - 1] = -1
+    def __setstate__(self, state: dict) -> None:
+        # boards pickled before the bitboard engine only carry `pieces`
+        self.n = state['n']
+        self.geometry = getGeometry(self.n)
+        self.legal_black = None
+        self.legal_white = None
+        self.symmetry = None
+        if 'pieces' in state:
+            self.pieces = state['pieces']
+        else:
+            self.black = state['black']
+            self.white = state['white']
+            self.key = self.geometry.zobristKey(self.black, self.white)
+            self.swapped_key = self.geometry.zobristKey(self.white, self.black)
+
+    @property
+    def pieces(self) -> list[list[int]]:
+        n = self.n
+        black, white = self.black, self.white
+        pieces = []
+        for x in range(n):
+            row = []
+            for y in range(n):
+                bit = 1 << (x * n + y)
+                row.append(1 if black & bit else -1 if white & bit else 0)
+            pieces.append(row)
+        return pieces
+
+    @pieces.setter
+    def pieces(self, pieces: list[list[int]]) -> None:
+        black = white = 0
+        for x, row in enumerate(pieces):
+            for y, value in enumerate(row):
+                if value == 1:
+                    black |= 1 << (x * self.n + y)
+                elif value == -1:
+                    white |= 1 << (x * self.n + y)
+        self.black = black
+        self.white = white
+        self.legal_black = None
+        self.legal_white = None
+        self.key = self.geometry.zobristKey(black, white)
+        self.swapped_key = self.geometry.zobristKey(white, black)
+        self.symmetry = None
 
     def __getitem__(self, key: tuple[int, int]) -> int:
         """
@@ -50,7 +306,12 @@ class Board:
 
         """
         x, y = key
-        return self.pieces[x][y]
+        bit = 1 << (x * self.n + y)
+        if self.black & bit:
+            return 1
+        if self.white & bit:
+            return -1
+        return 0
 
     def getBoardSize(self) -> int:
         """
@@ -71,7 +332,7 @@ class Board:
         Returns:
             int: The difference between the count of pieces of the specified player and the count of pieces of the opposite player.
         """
-        return sum([row.count(player) - row.count(-player) for row in self.pieces])
+        return player * (self.black.bit_count() - self.white.bit_count())
 
     def isValidMove(self, x: int, y: int, player: int) -> bool:
             """
@@ -85,21 +346,39 @@ class Board:
             Returns:
                 bool: True if the move is valid, False otherwise.
             """
-            for dx, dy in self.DIRECTIONS:
-                if x + dx >= self.n or x + dx < 0 or y + dy >= self.n or y + dy < 0:
-                    continue
-                if self.pieces[x + dx][y + dy] == 0:
-                    continue
-                if self.pieces[x + dx][y + dy] == player:
-                    continue
-                for i in range(2, self.n + 1):
-                    if x + i * dx >= self.n or x + i * dx < 0 or y + i * dy >= self.n or y + i * dy < 0:
-                        break
-                    if self.pieces[x + i * dx][y + i * dy] == 0:
-                        break
-                    if self.pieces[x + i * dx][y + i * dy] == player:
-                        return True
-            return False
+            if not 0 <= x < self.n or not 0 <= y < self.n:
+                return False
+            return bool(self.getLegalMovesMask(player) >> (x * self.n + y) & 1)
+
+    def getLegalMovesMask(self, player: int) -> int:
+        """
+        Returns the legal moves for the specified player as a bitboard, generating them on first use.
+
+        Args:
+            player (int): The player for whom to find legal moves.
+
+        Returns:
+            int: A bitboard with bit x * n + y set for every legal move (x, y).
+        """
+        if player == 1:
+            if self.legal_black is None:
+                self.legal_black = legalMovesMask(self.black, self.white, self.geometry)
+            return self.legal_black
+        if self.legal_white is None:
+            self.legal_white = legalMovesMask(self.white, self.black, self.geometry)
+        return self.legal_white
+
+    def swapColors(self) -> 'Board':
+        """
+        Returns the board with the colors of the two players exchanged, carrying over the cached legal moves.
+
+        Returns:
+            Board: The board seen from the other player's side.
+        """
+        board = Board(self.n, self.white, self.black, self.swapped_key, self.key)
+        board.legal_black = self.legal_white
+        board.legal_white = self.legal_black
+        return board
 
     def getLegalMoves(self, player: int) -> list[tuple[int, int]]:
             """
@@ -111,14 +390,85 @@ class Board:
             Returns:
                 list[(int, int)]: A list of legal moves represented as (x, y) coordinates.
             """
-            moves = []
-            for x in range(self.n):
-                for y in range(self.n):
-                    if self.pieces[x][y] != 0:
-                        continue
-                    if self.isValidMove(x, y, player):
-                        moves.append((x, y))
-            return moves
+            return [divmod(move, self.n) for move in iterBits(self.getLegalMovesMask(player))]
+
+    def nextBoard(self, move: int, player: int) -> 'Board':
+        """
+        Returns the board reached by playing a move, leaving this board untouched.
+
+        Args:
+            move (int): The move to be played.
+            player (int): The player making the move.
+
+        Returns:
+            Board: The board after the move, or this board if the move is a pass or invalid.
+        """
+        if move == self.n * self.n:
+            return self
+        # NumPy integers would turn the masks into fixed-width integers
+        move = int(move)
+        square = 1 << move
+        if player == 1:
+            own, opp = self.black, self.white
+        else:
+            own, opp = self.white, self.black
+        if (own | opp) & square:
+            return self
+        flips = flipsMask(square, own, opp, self.geometry)
+        if not flips:
+            return self
+        own |= flips | square
+        opp &= ~flips
+
+        geometry = self.geometry
+        toggled = 0
+        for flip in iterBits(flips):
+            toggled ^= geometry.zobrist_flip[flip]
+        if player == 1:
+            key = self.key ^ toggled ^ geometry.zobrist_black[move]
+            swapped_key = self.swapped_key ^ toggled ^ geometry.zobrist_white[move]
+            return Board(self.n, own, opp, key, swapped_key)
+        key = self.key ^ toggled ^ geometry.zobrist_white[move]
+        swapped_key = self.swapped_key ^ toggled ^ geometry.zobrist_black[move]
+        return Board(self.n, opp, own, key, swapped_key)
+
+    def transform(self, symmetry: int) -> 'Board':
+        """
+        Returns the board mapped through one of the 8 dihedral symmetries.
+
+        Args:
+            symmetry (int): The index of the symmetry in `Geometry.symmetries`.
+
+        Returns:
+            Board: The transformed board.
+        """
+        if symmetry == 0:
+            return self
+        permutation = self.geometry.symmetries[symmetry]
+        black = white = 0
+        for square in iterBits(self.black):
+            black |= 1 << permutation[square]
+        for square in iterBits(self.white):
+            white |= 1 << permutation[square]
+        return Board(self.n, black, white)
+
+    def canonicalSymmetry(self) -> tuple[int, int]:
+        """
+        Finds the symmetry-canonical representative of the position: the symmetric copy with the smallest Zobrist key.
+
+        Returns:
+            tuple[int, int]: The Zobrist key of the representative and the symmetry mapping this board onto it.
+        """
+        if self.symmetry is None:
+            keys = (0,) * 8
+            geometry = self.geometry
+            for square in iterBits(self.black):
+                keys = tuple(k ^ c for k, c in zip(keys, geometry.zobrist_black_sym[square]))
+            for square in iterBits(self.white):
+                keys = tuple(k ^ c for k, c in zip(keys, geometry.zobrist_white_sym[square]))
+            key = min(keys)
+            self.symmetry = (key, keys.index(key))
+        return self.symmetry
 
     def playMove(self, move: int, player: int) -> list[list[int]]:
         """
@@ -131,27 +481,7 @@ class Board:
         Returns:
             list[list[int]]: The updated game board after playing the move.
         """
-        if move == self.n * self.n:
-            return self.pieces
-        x, y = move // self.n, move % self.n
-        if not self.isValidMove(x, y, player):
-            return self.pieces
-        pieces = [[self.pieces[i][j] for j in range(self.n)] for i in range(self.n)]
-        pieces[x][y] = player
-        for dx, dy in self.DIRECTIONS:
-            for i in range(1, self.n + 1):
-                if x + i * dx >= self.n or x + i * dx < 0 or y + i * dy >= self.n or y + i * dy < 0:
-                    for j in range(1, i):
-                        pieces[x + j * dx][y + j * dy] = -player
-                    break
-                if pieces[x + i * dx][y + i * dy] == 0:
-                    for j in range(1, i):
-                        pieces[x + j * dx][y + j * dy] = -player
-                    break
-                if pieces[x + i * dx][y + i * dy] == player:
-                    break
-                pieces[x + i * dx][y + i * dy] = player
-        return pieces
+        return self.nextBoard(move, player).pieces
 
     def printBoard(self) -> None:
         """
@@ -167,9 +497,9 @@ class Board:
         for x in range(self.n):
             print(x, end=": ")
             for y in range(self.n):
-                if self.pieces[x][y] == 1:
+                if self[x, y] == 1:
                     print("X", end=" ")
-                elif self.pieces[x][y] == -1:
+                elif self[x, y] == -1:
                     print("O", end=" ")
                 else:
                     print("_", end=" ")
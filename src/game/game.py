@@ -1,4 +1,4 @@
-from src.game.board import Board
+from src.game.board import Board, iterBits
 
 import numpy as np
 
@@ -36,19 +36,14 @@ class Game:
         Returns:
             int: 0 if the game has not ended, 1 if the current player has won, -1 if the opponent has won.
         """
-        if len(board.getLegalMoves(1)) == 0 and len(board.getLegalMoves(-1)) == 0:
-            diff = board.diff(player)
-            if diff > 0:
-                return 1
-            elif diff < 0:
-                return -1
-            return 2
-        if len(board.getLegalMoves(1)) or len(board.getLegalMoves(-1)):
+        if board.getLegalMovesMask(1) or board.getLegalMovesMask(-1):
             return 0
         diff = board.diff(player)
         if diff > 0:
             return 1
-        return -1
+        elif diff < 0:
+            return -1
+        return 2
 
     def getValidMoves(self, board: Board, player: int) -> list[int]:
         """
@@ -61,12 +56,12 @@ class Game:
         Returns:
             list[int]: A list of valid moves represented as integers.
         """
-        moves = board.getLegalMoves(player)
+        moves = board.getLegalMovesMask(player)
         valids = [0] * self.getActionSize()
-        if len(moves) == 0:
+        if moves == 0:
             valids[-1] = 1
-        for x, y in moves:
-            valids[self.n * x + y] = 1
+        for move in iterBits(moves):
+            valids[move] = 1
         return valids
     
     def getActionSize(self) -> int:
@@ -92,9 +87,7 @@ class Game:
         """
         if move == self.n * self.n:
             return board, -player
-        new_board = Board(self.n)
-        new_board.pieces = board.playMove(move, player)
-        return new_board, -player
+        return board.nextBoard(move, player), -player
     
     def getBoardSize(self) -> tuple[int, int]:
         """
@@ -118,9 +111,7 @@ class Game:
         """
         if player == 1:
             return board
-        new_board = Board(self.n)
-        new_board.pieces = [[-p for p in row] for row in board.pieces]
-        return new_board
+        return board.swapColors()
     
     def getSymmetries(self, canonical_board: Board, pi: list[float]) -> list[tuple[Board, list[float]]]:
         """
@@ -0,0 +1,118 @@
+from collections import OrderedDict
+import itertools
+
+_versions = itertools.count()
+
+def nextVersion() -> int:
+    """
+    Returns a new weights version, unique in the process, for evaluators to key their cached evaluations with.
+
+    Returns:
+        int: The version.
+    """
+    return next(_versions)
+
+class EvaluationCache:
+    """
+    LRU cache of neural network evaluations, keyed by (model version, state key).
+
+    Attributes:
+        max_size (int): The maximum number of evaluations kept.
+        hits (int): The number of lookups answered from the cache.
+        misses (int): The number of lookups that needed the network.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        """
+        Initializes an empty cache.
+
+        Args:
+            max_size (int): The maximum number of evaluations kept.
+        """
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key: tuple[int, int]) -> tuple | None:
+        """
+        Looks up an evaluation and marks it as recently used.
+
+        Args:
+            key (tuple[int, int]): The model version and the state key.
+
+        Returns:
+            tuple | None: The cached (policy, value), or None if it is not cached.
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: tuple[int, int], entry: tuple) -> None:
+        """
+        Stores an evaluation, evicting the least recently used ones beyond `max_size`.
+
+        Args:
+            key (tuple[int, int]): The model version and the state key.
+            entry (tuple): The (policy, value) to store.
+        """
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def invalidate(self, version: int) -> None:
+        """
+        Drops every evaluation of a model version.
+
+        Args:
+            version (int): The model version whose weights changed.
+        """
+        for key in [key for key in self.entries if key[0] == version]:
+            del self.entries[key]
+
+    def hitRate(self) -> float:
+        """
+        Returns the fraction of lookups answered from the cache.
+
+        Returns:
+            float: The hit rate, 0 before any lookup.
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def clear(self) -> None:
+        """
+        Drops every evaluation and resets the counters.
+        """
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+_shared_cache = None
+
+def getEvaluationCache(max_size: int = None) -> EvaluationCache | None:
+    """
+    Returns the evaluation cache shared by every MCTS instance of the process.
+
+    Args:
+        max_size (int): The size limit, creating or resizing the shared cache. Without it, only an
+            existing cache is returned.
+
+    Returns:
+        EvaluationCache | None: The shared cache, or None if it has not been created.
+    """
+    global _shared_cache
+    if max_size:
+        if _shared_cache is None:
+            _shared_cache = EvaluationCache(max_size)
+        elif _shared_cache.max_size != max_size:
+            _shared_cache.max_size = max_size
+    return _shared_cache
\ No newline at end of file
@@ -0,0 +1,318 @@
+from src.model.OthelloNet import OthelloNet
+from src.model.model import OthelloModel
+from src.model.cache import nextVersion
+from src.game.game import Game
+from src.game.board import Board
+from src.game.batch import BatchGame
+
+import copy
+import warnings
+import numpy as np
+
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+import torch.ao.quantization as quantization
+
+def foldBatchNorm(layer: nn.Conv2d | nn.Linear, bn: nn.BatchNorm2d | nn.BatchNorm1d) -> nn.Conv2d | nn.Linear:
+    """
+    Returns a copy of a convolutional or linear layer with the batch normalization that follows it folded in.
+
+    Args:
+        layer (nn.Conv2d | nn.Linear): The layer.
+        bn (nn.BatchNorm2d | nn.BatchNorm1d): The batch normalization applied to its output, with its running statistics.
+
+    Returns:
+        nn.Conv2d | nn.Linear: A layer computing bn(layer(x)) in eval mode.
+    """
+    folded = copy.deepcopy(layer)
+    with torch.no_grad():
+        scale = bn.weight / torch.sqrt(bn.running_var + bn.eps)
+        bias = layer.bias if layer.bias is not None else torch.zeros_like(bn.running_mean)
+        folded.weight.copy_(layer.weight * scale.view(-1, *([1] * (layer.weight.dim() - 1))))
+        if folded.bias is None:
+            folded.bias = nn.Parameter(torch.zeros_like(bias))
+        folded.bias.copy_((bias - bn.running_mean) * scale + bn.bias)
+    return folded
+
+class FrozenOthelloNet(nn.Module):
+    """
+    Eval-mode `OthelloNet` with its batch normalizations folded into the preceding layers and no dropout.
+
+    Returns probabilities rather than log-probabilities, so callers do not need an exp.
+    """
+
+    def __init__(self, net: OthelloNet) -> None:
+        """
+        Freezes a copy of a network.
+
+        Args:
+            net (OthelloNet): The network, whose weights are copied.
+        """
+        super(FrozenOthelloNet, self).__init__()
+        self.x, self.y = net.x, net.y
+        self.conv1 = foldBatchNorm(net.conv1, net.bn1)
+        self.conv2 = foldBatchNorm(net.conv2, net.bn2)
+        self.conv3 = foldBatchNorm(net.conv3, net.bn3)
+        self.conv4 = foldBatchNorm(net.conv4, net.bn4)
+        self.fc1 = foldBatchNorm(net.fc1, net.fc_bn1)
+        self.fc2 = foldBatchNorm(net.fc2, net.fc_bn2)
+        self.fc3 = copy.deepcopy(net.fc3)
+        self.fc4 = copy.deepcopy(net.fc4)
+        self.eval()
+        for parameter in self.parameters():
+            parameter.requires_grad_(False)
+
+    def forward(self, s: torch.Tensor) -> tuple[torch.Tensor, torch.Tensor]:
+        """
+        Performs the forward pass.
+
+        Args:
+            s (torch.Tensor): The boards, of shape (B, x, y).
+
+        Returns:
+            Tuple: The policies (probabilities) and the values.
+        """
+        s = s.view(-1, 1, self.x, self.y)
+        s = F.relu(self.conv1(s))
+        s = F.relu(self.conv2(s))
+        s = F.relu(self.conv3(s))
+        s = F.relu(self.conv4(s))
+        s = s.flatten(1)
+        s = F.relu(self.fc1(s))
+        s = F.relu(self.fc2(s))
+        return F.softmax(self.fc3(s), dim=1), torch.tanh(self.fc4(s))
+
+def sampleBoards(size: int, count: int, seed: int = 0) -> np.ndarray:
+    """
+    Samples canonical positions of random games, to calibrate quantized activations on.
+
+    Args:
+        size (int): The size of the board.
+        count (int): The number of positions.
+        seed (int): The seed of the random moves.
+
+    Returns:
+        np.ndarray: The int8 boards, of shape (count, size, size).
+    """
+    rng = np.random.default_rng(seed)
+    game = BatchGame(size)
+    games = -(-count // (size * size - 4))
+    boards, players = game.getInitialBoards(games), np.ones(games, dtype=np.int8)
+    samples = []
+    for _ in range(size * size - 4):
+        samples.append(game.getCanonicalForm(boards, players))
+        valids = game.getValidMoves(boards, players)
+        # a random valid move per board
+        moves = np.argmax(valids * rng.random(valids.shape), axis=1)
+        boards, players = game.nextState(boards, players, moves)
+    samples = np.concatenate(samples)
+    return samples[rng.permutation(len(samples))[:count]]
+
+class QuantizedOthelloNet(nn.Module):
+    """
+    `FrozenOthelloNet` with int8 linear layers and, optionally, int8 convolutions.
+
+    Linear layers are quantized dynamically, their activations quantized per batch. The
+    convolutions can be quantized statically, with activation ranges calibrated on sample boards,
+    which is where most of the CPU time of `OthelloNet` goes.
+    """
+
+    def __init__(self, net: FrozenOthelloNet, calibration: np.ndarray = None) -> None:
+        """
+        Quantizes a copy of a frozen network.
+
+        Args:
+            net (FrozenOthelloNet): The frozen network.
+            calibration (np.ndarray): Boards of shape (B, x, y) to calibrate the convolutions on. Default is None, keeping float convolutions.
+        """
+        super(QuantizedOthelloNet, self).__init__()
+        self.x, self.y = net.x, net.y
+        self.convs = nn.Sequential(quantization.QuantStub(),
+                                   *(nn.Sequential(copy.deepcopy(conv), nn.ReLU()) for conv in (net.conv1, net.conv2, net.conv3, net.conv4)),
+                                   quantization.DeQuantStub())
+        self.fc1 = copy.deepcopy(net.fc1)
+        self.fc2 = copy.deepcopy(net.fc2)
+        self.fc3 = copy.deepcopy(net.fc3)
+        self.fc4 = copy.deepcopy(net.fc4)
+        self.eval()
+
+        with warnings.catch_warnings():
+            # the eager quantization API warns about its deprecation on every call
+            warnings.simplefilter('ignore')
+            if calibration is not None:
+                quantization.fuse_modules(self.convs, [[str(i) + '.0', str(i) + '.1'] for i in range(1, 5)], inplace=True)
+                self.convs.qconfig = quantization.get_default_qconfig(torch.backends.quantized.engine)
+                quantization.prepare(self.convs, inplace=True)
+                with torch.inference_mode():
+                    self.convs(torch.from_numpy(np.asarray(calibration, dtype=np.float32)).view(-1, 1, self.x, self.y))
+                quantization.convert(self.convs, inplace=True)
+            quantization.quantize_dynamic(self, {nn.Linear}, dtype=torch.qint8, inplace=True)
+
+    def forward(self, s: torch.Tensor) -> tuple[torch.Tensor, torch.Tensor]:
+        """
+        Performs the forward pass.
+
+        Args:
+            s (torch.Tensor): The boards, of shape (B, x, y).
+
+        Returns:
+            Tuple: The policies (probabilities) and the values.
+        """
+        s = self.convs(s.view(-1, 1, self.x, self.y))
+        s = s.flatten(1)
+        s = F.relu(self.fc1(s))
+        s = F.relu(self.fc2(s))
+        return F.softmax(self.fc3(s), dim=1), torch.tanh(self.fc4(s))
+
+class InferenceModel:
+    """
+    Fast CPU evaluation of a frozen copy of an `OthelloModel`, usable by MCTS in its place.
+
+    The network is a `FrozenOthelloNet`, or a `QuantizedOthelloNet` when quantized, compiled with
+    TorchScript and frozen, and run under `torch.inference_mode` on a preallocated input buffer.
+    The copy does not follow later training of the model; it keeps the weights version the model
+    had when it was frozen, or a version of its own when quantized since its evaluations differ.
+    An instance is not thread-safe, since calls share the input buffer.
+
+    Attributes:
+        net (torch.jit.ScriptModule | FrozenOthelloNet | QuantizedOthelloNet): The frozen network.
+        version (int): The weights version of the model when it was frozen, for the evaluation cache.
+        thread_safe (bool): False, so that threaded searches serialize their calls.
+    """
+
+    thread_safe = False
+
+    def __init__(self, model: OthelloModel, max_batch: int = 64, script: bool = True, quantize: bool = False,
+                 quantize_conv: bool = False, calibration: np.ndarray = None) -> None:
+        """
+        Freezes the current weights of a model.
+
+        Args:
+            model (OthelloModel): The model.
+            max_batch (int): The initial size of the input buffer, grown on larger batches.
+            script (bool): Whether to compile the network with TorchScript.
+            quantize (bool): Whether to use int8 weights for the linear layers.
+            quantize_conv (bool): Whether to also quantize the convolutions, implying `quantize`.
+            calibration (np.ndarray): Boards of shape (B, x, y) to calibrate quantized convolutions on. Default is None, using positions of random games.
+        """
+        self.x, self.y = model.x, model.y
+        self.action_size = model.action_size
+        self.version = model.version
+
+        net = FrozenOthelloNet(model.net)
+        if quantize or quantize_conv:
+            if quantize_conv and calibration is None:
+                calibration = sampleBoards(self.x, 512)
+            net = QuantizedOthelloNet(net, calibration if quantize_conv else None)
+            self.version = nextVersion()
+        if script:
+            with warnings.catch_warnings():
+                # TorchScript is deprecated in recent releases but still the cheapest compiler to warm up
+                warnings.simplefilter('ignore')
+                net = torch.jit.freeze(torch.jit.script(net))
+        self.net = net
+        self.allocate(max_batch)
+
+    @classmethod
+    def fromCheckpoint(cls, game: Game, folder: str, filename: str, **kwargs) -> 'InferenceModel':
+        """
+        Freezes the weights of a checkpoint saved by `OthelloModel.saveCheckpoint`.
+
+        Args:
+            game (Game): The game the model plays.
+            folder (str): The folder of the checkpoint.
+            filename (str): The filename of the checkpoint.
+            **kwargs: The options of the constructor.
+
+        Returns:
+            InferenceModel: The frozen model.
+        """
+        model = OthelloModel(game)
+        model.loadCheckpoint(folder, filename)
+        return cls(model, **kwargs)
+
+    def allocate(self, max_batch: int) -> None:
+        """
+        Allocates the input buffer.
+
+        Args:
+            max_batch (int): The number of boards the buffer holds.
+        """
+        self.buffer = torch.zeros((max_batch, self.x, self.y), dtype=torch.float32)
+        self.buffer_array = self.buffer.numpy()
+
+    def predict(self, board: Board) -> tuple[np.ndarray, float]:
+        """
+        Predicts the policy and value for a given board state.
+
+        Args:
+            board (Board): The board state.
+
+        Returns:
+            tuple: A tuple containing the policy (array of probabilities) and the value (float).
+        """
+        self.buffer_array[0] = board.pieces
+        with torch.inference_mode():
+            pi, v = self.net(self.buffer[:1])
+        return pi.numpy()[0], v.item()
+
+    def predictBatch(self, boards: list[Board]) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Predicts the policies and values of several board states with one forward pass.
+
+        Args:
+            boards (list[Board]): The board states.
+
+        Returns:
+            tuple: A tuple containing the policies (array of shape (B, action_size)) and the values (array of shape (B,)).
+        """
+        if len(boards) > len(self.buffer):
+            self.allocate(len(boards))
+        for i, board in enumerate(boards):
+            self.buffer_array[i] = board.pieces
+        return self.run(len(boards))
+
+    def predictArray(self, boards: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Predicts the policies and values of a stack of board matrices with one forward pass.
+
+        Args:
+            boards (np.ndarray): The board states, of shape (B, x, y).
+
+        Returns:
+            tuple: A tuple containing the policies (array of shape (B, action_size)) and the values (array of shape (B,)).
+        """
+        if len(boards) > len(self.buffer):
+            self.allocate(len(boards))
+        self.buffer_array[:len(boards)] = boards
+        return self.run(len(boards))
+
+    def run(self, count: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Runs the network on the first boards of the input buffer.
+
+        Args:
+            count (int): The number of boards.
+
+        Returns:
+            tuple: The policies and values.
+        """
+        with torch.inference_mode():
+            pi, v = self.net(self.buffer[:count])
+        return pi.numpy(), v.numpy()[:, 0]
+
+def exportNumpy(model: OthelloModel, filename: str) -> None:
+    """
+    Writes the weights of a model, with its batch normalizations folded, to an .npz file for `NumpyModel`.
+
+    The arrays keep the layouts of `FrozenOthelloNet`'s parameters, named like them (conv1.weight,
+    conv1.bias, ..., fc4.bias), next to `size` holding the board dimensions.
+
+    Args:
+        model (OthelloModel): The model.
+        filename (str): The file to write.
+    """
+    net = FrozenOthelloNet(model.net)
+    arrays = {name: value.detach().cpu().numpy().astype(np.float32) for name, value in net.state_dict().items()}
+    np.savez(filename, size=np.array([net.x, net.y]), **arrays)
@@ -1,8 +1,11 @@
 from src.model.OthelloNet import OthelloNet
+from src.model.cache import getEvaluationCache, nextVersion
 from src.game.game import Game
 from src.game.board import Board
+from src.train.replay import ReplayBuffer
 
 import os
+import time
 import numpy as np
 
 import torch.optim as optim
@@ -21,6 +24,22 @@ args_dict = {
     'num_sims': 5,
     'dropout': 0.3,
     'c_puct': 1,
+    'mcts_batch_size': 1, # leaves evaluated per forward pass in MCTS, 1 for sequential search
+    'virtual_loss': 1.0,  # virtual visits (each counted as a loss) added to a pending path
+    'mcts_threads': 1,    # threads searching one MCTS tree concurrently, 1 for a single-threaded search
+    'max_nodes': None,    # cap on MCTS tree nodes, least recently reached nodes are evicted beyond it
+    'max_tree_bytes': None, # cap on approximate MCTS tree memory, combined with max_nodes
+    'eval_cache_size': 100000, # evaluations kept in the LRU cache shared by MCTS instances, 0 to disable
+    'symmetry_canonical': False, # share MCTS nodes and evaluations between symmetric positions
+    'endgame_empties': 0, # empty squares at or below which MCTS solves positions exactly, 0 to always search
+    'mcts_stats': False,  # record search statistics per simulate call, reported by Trainer and Arena
+    'num_workers': 1,     # self-play worker processes, above 1 to use the batched inference server
+    'lockstep_games': 1,  # self-play games played in lockstep in one process
+    'frozen_inference': False, # search self-play and in-process arena games with a frozen InferenceModel of the weights
+    'inference_batch_size': 64, # maximum positions per forward pass of the inference server
+    'inference_timeout': 0.002, # seconds the inference server waits to fill a batch
+    'prefetch_batches': 2, # training batches sampled ahead by a background thread, 0 to sample inline
+    'augment_symmetries': True, # train on a random board symmetry of each sampled example
     'num_iters': 10
     # TODO: add arguments
 }
@@ -39,16 +58,39 @@ class OthelloModel():
             None
         """
         self.net = OthelloNet(game, args)
+        # kept in eval mode outside of `train`, so predictions do not switch modes on every call
+        self.net.eval()
         self.x, self.y = game.getBoardSize()
         self.action_size = game.getActionSize()
+        self.version = nextVersion()
 
-    def train(self, examples: list[tuple[Board, list[float], float]]) -> None:
+    def updateVersion(self) -> None:
         """
-        Trains the model using the examples stored in self.examples.
+        Gives the model a new weights version after its weights changed, dropping cached evaluations of the old one.
 
         Returns:
             None
         """
+        cache = getEvaluationCache()
+        if cache is not None:
+            cache.invalidate(self.version)
+        self.version = nextVersion()
+
+    def train(self, examples: ReplayBuffer | list[tuple[Board, list[float], float]]) -> None:
+        """
+        Trains the model on batches sampled from a replay buffer.
+
+        Args:
+            examples (ReplayBuffer | list[(Board, list[float], float)]): The replay buffer, or examples to fill one with.
+
+        Returns:
+            None
+        """
+        if not isinstance(examples, ReplayBuffer):
+            replay = ReplayBuffer(max(len(examples), 1), self.x, self.action_size)
+            replay.extend(examples, 0)
+            examples = replay
+
         optimizer = optim.Adam(self.net.parameters())
 
         for epoch in tqdm(range(args.epochs)):
@@ -58,15 +100,11 @@ class OthelloModel():
             self.net.train()
 
             batch_count = int(len(examples) / args.batch_size)
+            start = time.perf_counter()
 
-            for _ in tqdm(range(batch_count), desc="OthelloNet.train"):
-                sample_ids = np.random.randint(len(examples), size=args.batch_size)
-                boards, pis, vs = list(zip(*[examples[i] for i in sample_ids]))
-                boards = [board.pieces for board in boards]
-                boards_tensor = torch.FloatTensor(np.array(boards).astype(np.float64))
-                target_pis = torch.FloatTensor(np.array(pis))
-                target_vs = torch.FloatTensor(np.array(vs).astype(np.float64))
-
+            batches = examples.batches(args.batch_size, batch_count, prefetch=getattr(args, 'prefetch_batches', 0),
+                                       augment=getattr(args, 'augment_symmetries', False))
+            for boards_tensor, target_pis, target_vs in tqdm(batches, total=batch_count, desc="OthelloNet.train"):
                 pi, v = self.net(boards_tensor)
 
                 # compute loss
@@ -83,7 +121,12 @@ class OthelloModel():
                 total_loss.backward()
                 optimizer.step()
             
-            print("pi loss: {:.5f}, v loss: {:.5f}".format(np.mean(pi_losses), np.mean(v_losses)))
+            elapsed = time.perf_counter() - start
+            print("pi loss: {:.5f}, v loss: {:.5f}, {:.0f} samples/s".format(
+                np.mean(pi_losses), np.mean(v_losses), batch_count * args.batch_size / elapsed if elapsed > 0 else 0.0))
+
+        self.net.eval()
+        self.updateVersion()
 
     def predict(self, board: Board) -> tuple[list[float], float]:
         """
@@ -95,14 +138,39 @@ class OthelloModel():
         Returns:
             tuple: A tuple containing the policy (list of probabilities) and the value (float).
         """
-        board_tensor = np.asarray(board.pieces)
-        board_tensor = torch.FloatTensor(board_tensor.astype(np.float64))
-        board_tensor = board_tensor.view(1, self.x, self.y)
-        self.net.eval()
-        with torch.no_grad():
+        board_tensor = torch.tensor(board.pieces, dtype=torch.float32).view(1, self.x, self.y)
+        with torch.inference_mode():
             pi, v = self.net(board_tensor)
 
-        return torch.exp(pi).data.cpu().numpy()[0], v.data.cpu().numpy()[0]
+        return torch.exp(pi).cpu().numpy()[0], v.item()
+
+    def predictBatch(self, boards: list[Board]) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Predicts the policies and values of several board states with one forward pass.
+
+        Args:
+            boards (list[Board]): The board states.
+
+        Returns:
+            tuple: A tuple containing the policies (array of shape (B, action_size)) and the values (array of shape (B,)).
+        """
+        return self.predictArray(np.array([board.pieces for board in boards], dtype=np.float32))
+
+    def predictArray(self, boards: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Predicts the policies and values of a stack of board matrices with one forward pass.
+
+        Args:
+            boards (np.ndarray): The board states, of shape (B, x, y).
+
+        Returns:
+            tuple: A tuple containing the policies (array of shape (B, action_size)) and the values (array of shape (B,)).
+        """
+        boards_tensor = torch.as_tensor(np.ascontiguousarray(boards, dtype=np.float32))
+        with torch.inference_mode():
+            pi, v = self.net(boards_tensor)
+
+        return torch.exp(pi).cpu().numpy(), v.cpu().numpy()[:, 0]
     
     def saveCheckpoint(self, folder: str = 'checkpoint', filename: str = 'checkpoint.pth.tar') -> None:
         """
@@ -139,5 +207,6 @@ class OthelloModel():
             raise("no model in path {}".format(filepath))
         checkpoint = torch.load(filepath)
         self.net.load_state_dict(checkpoint['state_dict'])
+        self.updateVersion()
     
         
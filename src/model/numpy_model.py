@@ -0,0 +1,123 @@
+from src.game.board import Board
+from src.model.cache import nextVersion
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+class NumpyModel:
+    """
+    NumPy implementation of the eval-mode forward pass of `OthelloNet`, usable by MCTS in place of `OthelloModel` without torch.
+
+    Weights come from an .npz file written by `exportNumpy`, with batch normalization already folded
+    into the convolutional and linear layers. Activations are kept channels-last, so each convolution
+    is one matrix product over its 3x3 windows.
+
+    Attributes:
+        x (int): The number of rows of the board.
+        y (int): The number of columns of the board.
+        version (int): The weights version, for the evaluation cache.
+    """
+
+    def __init__(self, filename: str) -> None:
+        """
+        Loads exported weights.
+
+        Args:
+            filename (str): The .npz file written by `exportNumpy`.
+        """
+        with np.load(filename) as weights:
+            self.x, self.y = (int(d) for d in weights['size'])
+            # (out, in, 3, 3) kernels as (3 * 3 * in, out) matrices matching the window layout
+            self.convs = []
+            for name, padding in (('conv1', 1), ('conv2', 1), ('conv3', 0), ('conv4', 0)):
+                kernel = weights[name + '.weight']
+                self.convs.append((np.ascontiguousarray(kernel.transpose(2, 3, 1, 0).reshape(-1, kernel.shape[0])), weights[name + '.bias'], padding))
+
+            # fc1 reads the flattened (channels, rows, columns) activations of torch, reordered to channels-last
+            fc1 = weights['fc1.weight']
+            channels = self.convs[-1][0].shape[1]
+            fc1 = fc1.reshape(len(fc1), channels, self.x - 4, self.y - 4).transpose(0, 2, 3, 1).reshape(len(fc1), -1)
+            self.fcs = [(np.ascontiguousarray(fc1.T), weights['fc1.bias'])]
+            for name in ('fc2', 'fc3', 'fc4'):
+                self.fcs.append((np.ascontiguousarray(weights[name + '.weight'].T), weights[name + '.bias']))
+        self.version = nextVersion()
+
+    def conv(self, s: np.ndarray, kernel: np.ndarray, bias: np.ndarray, padding: int) -> np.ndarray:
+        """
+        Applies a 3x3 convolution with stride 1 to channels-last activations.
+
+        Args:
+            s (np.ndarray): The activations, of shape (B, x, y, in).
+            kernel (np.ndarray): The kernel matrix, of shape (3 * 3 * in, out).
+            bias (np.ndarray): The bias, of shape (out,).
+            padding (int): The zero padding on each side.
+
+        Returns:
+            np.ndarray: The activations, of shape (B, x', y', out).
+        """
+        if padding:
+            s = np.pad(s, ((0, 0), (padding, padding), (padding, padding), (0, 0)))
+        windows = sliding_window_view(s, (3, 3), axis=(1, 2))    # (B, x', y', in, 3, 3)
+        batch, rows, columns = windows.shape[:3]
+        windows = windows.transpose(0, 1, 2, 4, 5, 3).reshape(batch * rows * columns, -1)
+        return (windows @ kernel + bias).reshape(batch, rows, columns, -1)
+
+    def forward(self, boards: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Performs the forward pass.
+
+        Args:
+            boards (np.ndarray): The boards, of shape (B, x, y).
+
+        Returns:
+            Tuple: The policies (probabilities) and the values, of shapes (B, action_size) and (B,).
+        """
+        s = np.asarray(boards, dtype=np.float32).reshape(-1, self.x, self.y, 1)
+        for kernel, bias, padding in self.convs:
+            s = np.maximum(self.conv(s, kernel, bias, padding), 0)
+        s = s.reshape(len(s), -1)
+
+        (w1, b1), (w2, b2), (w3, b3), (w4, b4) = self.fcs
+        s = np.maximum(s @ w1 + b1, 0)
+        s = np.maximum(s @ w2 + b2, 0)
+        logits = s @ w3 + b3
+        pi = np.exp(logits - logits.max(axis=1, keepdims=True))
+        pi /= pi.sum(axis=1, keepdims=True)
+        return pi, np.tanh(s @ w4 + b4)[:, 0]
+
+    def predict(self, board: Board) -> tuple[np.ndarray, float]:
+        """
+        Predicts the policy and value for a given board state.
+
+        Args:
+            board (Board): The board state.
+
+        Returns:
+            tuple: A tuple containing the policy (array of probabilities) and the value (float).
+        """
+        pis, vs = self.forward(board.pieces)
+        return pis[0], float(vs[0])
+
+    def predictBatch(self, boards: list[Board]) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Predicts the policies and values of several board states.
+
+        Args:
+            boards (list[Board]): The board states.
+
+        Returns:
+            tuple: A tuple containing the policies (array of shape (B, action_size)) and the values (array of shape (B,)).
+        """
+        return self.forward([board.pieces for board in boards])
+
+    def predictArray(self, boards: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Predicts the policies and values of a stack of board matrices.
+
+        Args:
+            boards (np.ndarray): The board states, of shape (B, x, y).
+
+        Returns:
+            tuple: A tuple containing the policies (array of shape (B, action_size)) and the values (array of shape (B,)).
+        """
+        return self.forward(boards)
\ No newline at end of file
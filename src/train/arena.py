@@ -1,7 +1,11 @@
 from src.game.game import Game
 from src.train.players import *
+from src.MCTS.stats import StatsCollector, addStatsHook, removeStatsHook
 from tqdm import tqdm
 
+import multiprocessing as mp
+import numpy as np
+
 class Arena:
     def __init__(self, player1: OthelloPlayer, player2: OthelloPlayer, game: Game):
             """
@@ -15,10 +19,11 @@ class Arena:
             self.player1 = player1
             self.player2 = player2
             self.game = game
+            self.search_stats = None
 
     def playGame(self, print_board: bool = False) -> int:
             """
-            Executes one episode of a game.
+            Executes one episode of a game, starting from reset players.
 
             Args:
                 print_board (bool): Flag to indicate whether to print the board during the game.
@@ -29,6 +34,9 @@ class Arena:
             board = self.game.getInitialBoard()
 
             players = [self.player2, None, self.player1]
+            # search trees and clocks start over every game
+            self.player1.reset()
+            self.player2.reset()
 
             current_player = 1
 
@@ -42,9 +50,10 @@ class Arena:
             while self.game.hasGameEnded(board, current_player) == 0:
                 i += 1
                 # Get move
-                move = players[current_player + 1].getAction(self.game.getCanonicalForm(board, current_player))
+                canonical_board = self.game.getCanonicalForm(board, current_player)
+                move = players[current_player + 1].getAction(canonical_board)
 
-                valids = self.game.getValidMoves(self.game.getCanonicalForm(board, current_player), 1)
+                valids = self.game.getValidMoves(canonical_board, 1)
 
                 if valids[move] != 0:
                     board, current_player = self.game.nextState(board, current_player, move)
@@ -63,44 +72,144 @@ class Arena:
 
             return result * current_player
     
-    def playGames(self, num_games: int, print_board: bool = False) -> tuple[int, int, int]:
+    def playGames(self, num_games: int, print_board: bool = False, num_workers: int = 1, seed: int = None) -> tuple[int, int, int]:
         """
         Play a specified number of games between two players and return the results.
 
+        Player 1 starts the first half of the games and player 2 the second half. With `num_workers`
+        above 1 or a `seed`, every game starts from reset players and its own seed (`seed + index`),
+        so the results do not depend on how games are spread over worker processes.
+
+        When a player's MCTS collects statistics (`args.mcts_stats`), those of the games played in this
+        process are printed at the end and kept in `search_stats`, a `SearchStats` per player (None without MCTS).
+
         Args:
             num_games (int): The number of games to be played.
             print_board (bool): Flag indicating whether to print the board after each move. Default is False.
+            num_workers (int): The number of worker processes. Default is 1, playing in this process.
+            seed (int): The base seed of the games. Default is None, random when playing in parallel.
+
+        Returns:
+            tuple: A tuple containing the number of wins for player 1, player 2, and draws, respectively.
+        """
+        collector = StatsCollector()
+        searches = [getattr(player, 'mcts', None) for player in (self.player1, self.player2)]
+        collecting = any(getattr(mcts, 'collect_stats', False) for mcts in searches)
+        if collecting:
+            addStatsHook(collector)
+
+        try:
+            if num_workers > 1 or seed is not None:
+                return self.playSeededGames(num_games, print_board, num_workers, seed)
+
+            num = num_games // 2
+            wins = [0, 0]
+            draws = 0
+
+            for _ in tqdm(range(num), desc="Arena.playGames (P1 starts)"):
+                result = self.playGame(print_board)
+                if result == 0:
+                    draws += 1
+                elif result == -1:
+                    wins[1] += 1
+                elif result == 1:
+                    wins[0] += 1
+                else:
+                    draws += 1
+
+            self.player1, self.player2 = self.player2, self.player1
+
+            for _ in tqdm(range(num), desc="Arena.playGames (P2 starts)"):
+                result = self.playGame(print_board)
+                if result == 0:
+                    draws += 1
+                elif result == -1:
+                    wins[0] += 1
+                elif result == 1:
+                    wins[1] += 1
+                else:
+                    draws += 1
+
+            return (wins[0], wins[1], draws)
+        finally:
+            if collecting:
+                removeStatsHook(collector)
+                self.search_stats = [collector.of(mcts) if mcts is not None else None for mcts in searches]
+                for i, stats in enumerate(self.search_stats):
+                    if stats is not None:
+                        print("Player {} search: {}".format(i + 1, stats))
+
+    def playSeededGames(self, num_games: int, print_board: bool, num_workers: int, seed: int) -> tuple[int, int, int]:
+        """
+        Play games independently seeded, in this process or streamed back from a pool of worker processes.
+
+        Args:
+            num_games (int): The number of games to be played.
+            print_board (bool): Flag indicating whether to print the board after each move.
+            num_workers (int): The number of worker processes.
+            seed (int): The base seed of the games, random if None.
 
         Returns:
             tuple: A tuple containing the number of wins for player 1, player 2, and draws, respectively.
         """
         num = num_games // 2
+        if seed is None:
+            seed = np.random.randint(2 ** 31 - 2 * num)
+        # (seed, player 2 starts) of each game
+        tasks = [(seed + i, i >= num) for i in range(2 * num)]
+
         wins = [0, 0]
         draws = 0
 
-        for _ in tqdm(range(num), desc="Arena.playGames (P1 starts)"):
-            result = self.playGame(print_board)
-            if result == 0:
-                draws += 1
-            elif result == -1:
-                wins[1] += 1
-            elif result == 1:
-                wins[0] += 1
-            else:
-                draws += 1
+        if num_workers > 1:
+            ctx = mp.get_context('spawn')
+            pool = ctx.Pool(num_workers, initializer=initArenaWorker, initargs=(self.player1, self.player2, self.game))
+            results = pool.imap_unordered(playArenaGame, [task + (print_board,) for task in tasks])
+        else:
+            initArenaWorker(self.player1, self.player2, self.game)
+            results = (playArenaGame(task + (print_board,)) for task in tasks)
 
-        self.player1, self.player2 = self.player2, self.player1
-
-        for _ in tqdm(range(num), desc="Arena.playGames (P2 starts)"):
-            result = self.playGame(print_board)
-            if result == 0:
-                draws += 1
-            elif result == -1:
+        for result in tqdm(results, total=len(tasks), desc="Arena.playGames"):
+            if result == 1:
                 wins[0] += 1
-            elif result == 1:
+            elif result == -1:
                 wins[1] += 1
             else:
                 draws += 1
 
+        if num_workers > 1:
+            pool.close()
+            pool.join()
+
         return (wins[0], wins[1], draws)
 
+_arena = None
+
+def initArenaWorker(player1: OthelloPlayer, player2: OthelloPlayer, game: Game) -> None:
+    """
+    Sets up the players a worker process plays its arena games with.
+
+    Args:
+        player1 (OthelloPlayer): The first player.
+        player2 (OthelloPlayer): The second player.
+        game (Game): The game object.
+    """
+    global _arena
+    _arena = Arena(player1, player2, game)
+
+def playArenaGame(task: tuple[int, bool, bool]) -> int:
+    """
+    Plays one seeded arena game with reset players.
+
+    Args:
+        task (tuple[int, bool, bool]): The seed of the game, whether player 2 starts, and whether to print the board.
+
+    Returns:
+        int: The result of the game for player 1: 1 for a win, -1 for a loss, anything else for a draw.
+    """
+    seed, swapped, print_board = task
+    np.random.seed(seed)
+    if not swapped:
+        return _arena.playGame(print_board)
+    arena = Arena(_arena.player2, _arena.player1, _arena.game)
+    return -arena.playGame(print_board)
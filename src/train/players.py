@@ -1,8 +1,12 @@
 from src.game.board import Board
 from src.MCTS.mcts import MCTS
+from src.MCTS.book import OpeningBook
+from src.MCTS.timing import TimeManager
 
 from abc import ABC, abstractmethod
 
+import time
+
 import numpy as np
 
 class OthelloPlayer(ABC):
@@ -16,6 +20,7 @@ class OthelloPlayer(ABC):
 
     Methods:
         getAction: Returns the action to play in a game.
+        reset: Forgets any state kept from previous games.
 
     """
     @abstractmethod
@@ -32,6 +37,15 @@ class OthelloPlayer(ABC):
         """
         pass
 
+    def reset(self) -> None:
+        """
+        Forgets any state kept from previous games, so the next game only depends on the random seed.
+
+        Returns:
+            None
+        """
+        pass
+
 class RandomPlayer(OthelloPlayer):
     """
     Player that plays a random action.
@@ -104,14 +118,11 @@ class GreedyPlayer(OthelloPlayer):
         if len(valids) == 0:
             return board.getBoardSize() ** 2
         actions = []
-        for action in range(board.getBoardSize() ** 2):
-            action_xy = (action // board.getBoardSize(), action % board.getBoardSize())
-            if action_xy in valids:
-                next_pieces = board.playMove(action, 1)
-                next_board = Board(board.getBoardSize())
-                next_board.pieces = next_pieces
-                score = next_board.diff(1)
-                actions.append((-score, action))
+        for x, y in valids:
+            action = x * board.getBoardSize() + y
+            next_board = board.nextBoard(action, 1)
+            score = next_board.diff(1)
+            actions.append((-score, action))
         actions.sort()
         best_action = board.getBoardSize() ** 2 if len(actions) == 0 else actions[0][1]
         return best_action
@@ -119,15 +130,39 @@ class GreedyPlayer(OthelloPlayer):
 class MCTSPlayer(OthelloPlayer):
     """
     Player that uses the MCTS algorithm to play an action.
+
+    With `args.endgame_empties` set, the search returns the endgame solver's move once few enough squares are empty.
+    With an opening book, positions of the book are answered from it without searching.
+
+    Without a budget, every search runs `args.num_sims` simulations. With `max_sims`, `move_time`
+    or a `time_manager` (the smallest budget wins), searches stop at the budget or as soon as the most
+    visited move cannot be overtaken.
+
+    Attributes:
+        move_stats (list[tuple[int, float]]): The simulations and seconds of each move of the current game.
     """
-    def __init__(self, mcts: MCTS) -> None:
+    def __init__(self, mcts: MCTS, book: OpeningBook = None, book_temperature: float = 1.0, max_sims: int = None,
+                 move_time: float = None, time_manager: TimeManager = None, verbose: bool = False) -> None:
         """
         Initializes the MCTSPlayer class.
 
         Parameters:
         - mcts (MCTS): The MCTS algorithm instance used by the player.
+        - book (OpeningBook): The opening book to play from, None to always search.
+        - book_temperature (float): Temperature of the sampling from the book's visit counts, 0 to play the most visited move.
+        - max_sims (int): The simulation budget of each move.
+        - move_time (float): The time budget of each move, in seconds.
+        - time_manager (TimeManager): The clock of the game, spread over the moves.
+        - verbose (bool): Whether to print the simulations and time of each move.
         """
         self.mcts = mcts
+        self.book = book
+        self.book_temperature = book_temperature
+        self.max_sims = max_sims
+        self.move_time = move_time
+        self.time_manager = time_manager
+        self.verbose = verbose
+        self.move_stats = []
         
         
     def getAction(self, board: Board) -> int:
@@ -140,6 +175,40 @@ class MCTSPlayer(OthelloPlayer):
         Returns:
         - int: The selected action.
         """
-        pi = self.mcts.simulate(board)
-        action = np.random.choice(len(pi), p=pi)
-        return action
\ No newline at end of file
+        start = time.perf_counter()
+        action = self.book.sample(board, self.book_temperature) if self.book is not None else None
+        sims = 0
+
+        if action is None:
+            seconds = self.move_time
+            if self.time_manager is not None:
+                budget = self.time_manager.budget(board)
+                seconds = budget if seconds is None else min(seconds, budget)
+
+            self.mcts.reroot(board)
+            if self.max_sims is None and seconds is None:
+                pi = self.mcts.simulate(board)
+            else:
+                pi = self.mcts.simulate(board, self.max_sims, seconds, early_stop=True)
+            action = np.random.choice(len(pi), p=pi)
+            sims = self.mcts.last_sims
+
+        elapsed = time.perf_counter() - start
+        if self.time_manager is not None:
+            self.time_manager.spend(elapsed)
+        self.move_stats.append((sims, elapsed))
+        if self.verbose:
+            print("MCTSPlayer: {} sims in {:.3f}s".format(sims, elapsed))
+        return action
+
+    def reset(self) -> None:
+        """
+        Clears the search tree, the move statistics and the clock.
+
+        Returns:
+            None
+        """
+        self.mcts.clear()
+        self.move_stats = []
+        if self.time_manager is not None:
+            self.time_manager.reset()
\ No newline at end of file
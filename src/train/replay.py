@@ -0,0 +1,162 @@
+from src.game.board import getGeometry
+from src.train.storage import ExampleShard
+
+import queue
+import threading
+import numpy as np
+import torch
+
+class ReplayBuffer:
+    """
+    Fixed-capacity ring buffer of training examples held in preallocated tensors.
+
+    Appending overwrites the oldest examples once the buffer is full, and every example is tagged
+    with the iteration it comes from so whole iterations can be evicted. Batches are sampled by
+    indexing the tensors, without building Python objects, and can be augmented with a random
+    dihedral symmetry per example so that only one orientation of each position needs to be stored.
+
+    Attributes:
+        capacity (int): The maximum number of examples kept.
+        boards (torch.Tensor): int8 boards of shape (capacity, n, n).
+        pis (torch.Tensor): float32 policies of shape (capacity, action_size).
+        vs (torch.Tensor): float32 values of shape (capacity,).
+        iterations (torch.Tensor): int64 iteration of each example, of shape (capacity,).
+        start (int): The slot of the oldest example.
+        size (int): The number of examples kept.
+        permutations (torch.Tensor): Per symmetry, the index of the action each action is read from, of shape (8, action_size).
+    """
+
+    def __init__(self, capacity: int, size: int, action_size: int) -> None:
+        """
+        Allocates an empty buffer.
+
+        Args:
+            capacity (int): The maximum number of examples kept.
+            size (int): The size of the board.
+            action_size (int): The number of actions.
+        """
+        self.capacity = capacity
+        self.boards = torch.zeros((capacity, size, size), dtype=torch.int8)
+        self.pis = torch.zeros((capacity, action_size), dtype=torch.float32)
+        self.vs = torch.zeros(capacity, dtype=torch.float32)
+        self.iterations = torch.zeros(capacity, dtype=torch.int64)
+        self.start = 0
+        self.size = 0
+
+        # gather indices of the 8 symmetries, the pass action mapped to itself
+        permutations = torch.arange(action_size).repeat(8, 1)
+        for t, symmetry in enumerate(getGeometry(size).symmetries):
+            permutations[t, torch.tensor(symmetry)] = torch.arange(size * size)
+        self.permutations = permutations
+
+    def __len__(self) -> int:
+        return self.size
+
+    def extend(self, examples, iteration: int) -> None:
+        """
+        Appends the examples of an iteration, overwriting the oldest ones beyond the capacity.
+
+        Args:
+            examples: An `ExampleShard` or a sequence of (Board, pi, v) examples.
+            iteration (int): The iteration the examples come from, not lower than that of the examples already kept.
+        """
+        if not isinstance(examples, ExampleShard):
+            examples = ExampleShard.fromExamples(examples)
+        count = len(examples)
+        if count == 0:
+            return
+        skip = max(count - self.capacity, 0)
+        count -= skip
+
+        slots = (self.start + self.size + torch.arange(count)) % self.capacity
+        self.boards[slots] = torch.from_numpy(np.array(examples.boards[skip:], dtype=np.int8))
+        self.pis[slots] = torch.from_numpy(np.array(examples.pis[skip:], dtype=np.float32))
+        self.vs[slots] = torch.from_numpy(np.array(examples.vs[skip:], dtype=np.float32))
+        self.iterations[slots] = iteration
+
+        overflow = max(self.size + count - self.capacity, 0)
+        self.start = (self.start + overflow) % self.capacity
+        self.size += count - overflow
+
+    def evictIterations(self, keep: int) -> int:
+        """
+        Drops the examples of all but the last `keep` iterations.
+
+        Args:
+            keep (int): The number of most recent iterations to keep.
+
+        Returns:
+            int: The number of examples dropped.
+        """
+        if self.size == 0:
+            return 0
+        iterations = self.iterations[(self.start + torch.arange(self.size)) % self.capacity]
+        # iterations only grow from the oldest slot to the newest
+        distinct = torch.unique_consecutive(iterations)
+        if len(distinct) <= keep:
+            return 0
+        dropped = int((iterations < distinct[len(distinct) - keep]).sum()) if keep > 0 else self.size
+        self.start = (self.start + dropped) % self.capacity
+        self.size -= dropped
+        return dropped
+
+    def sample(self, batch_size: int, augment: bool = False) -> tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+        """
+        Samples a batch of examples uniformly with replacement.
+
+        Args:
+            batch_size (int): The number of examples.
+            augment (bool): Whether to map each example through a random one of the 8 board symmetries.
+
+        Returns:
+            tuple: The float32 boards, policies and values of the batch.
+        """
+        slots = (self.start + torch.randint(self.size, (batch_size,))) % self.capacity
+        boards, pis = self.boards[slots], self.pis[slots]
+        if augment:
+            permutations = self.permutations[torch.randint(8, (batch_size,))]
+            squares = boards.shape[1] * boards.shape[2]
+            boards = boards.view(batch_size, -1).gather(1, permutations[:, :squares]).view(boards.shape)
+            pis = pis.gather(1, permutations)
+        return boards.float(), pis, self.vs[slots]
+
+    def batches(self, batch_size: int, count: int, prefetch: int = 0, augment: bool = False):
+        """
+        Yields sampled batches.
+
+        Args:
+            batch_size (int): The number of examples per batch.
+            count (int): The number of batches.
+            prefetch (int): The number of batches sampled ahead by a background thread, 0 to sample in the caller's thread.
+            augment (bool): Whether to map each example through a random one of the 8 board symmetries.
+
+        Yields:
+            tuple: The float32 boards, policies and values of each batch.
+        """
+        if prefetch <= 0:
+            for _ in range(count):
+                yield self.sample(batch_size, augment)
+            return
+
+        batches = queue.Queue(maxsize=prefetch)
+        stop = threading.Event()
+
+        def produce():
+            for _ in range(count):
+                if stop.is_set():
+                    return
+                batches.put(self.sample(batch_size, augment))
+
+        producer = threading.Thread(target=produce, daemon=True)
+        producer.start()
+        try:
+            for _ in range(count):
+                yield batches.get()
+        finally:
+            stop.set()
+            # unblock the producer if the consumer stopped early
+            while producer.is_alive():
+                try:
+                    batches.get_nowait()
+                except queue.Empty:
+                    producer.join(timeout=0.01)
\ No newline at end of file
@@ -0,0 +1,458 @@
+from src.game.game import Game
+from src.game.board import Board
+from src.model.model import OthelloModel
+from src.model.inference import InferenceModel
+from src.MCTS.mcts import MCTS
+from src.MCTS.stats import SearchStats
+
+import queue
+import time
+import types
+import multiprocessing as mp
+import numpy as np
+from tqdm import tqdm
+
+class Episode:
+    """
+    State of one self-play game: the position, the player to move and the examples collected so far.
+
+    Attributes:
+        game (Game): The game object.
+        mcts (MCTS): The search used for both players.
+        board (Board): The current board.
+        current_player (int): The player to move.
+        canonical_board (Board): The current board from the perspective of the player to move.
+        training_examples (list): The examples collected, as [board, player, pi, None] lists.
+    """
+
+    def __init__(self, game: Game, mcts: MCTS) -> None:
+        """
+        Starts a game from the initial board.
+
+        Args:
+            game (Game): The game object.
+            mcts (MCTS): The search used for both players.
+        """
+        self.game = game
+        self.mcts = mcts
+        self.board = game.getInitialBoard()
+        self.current_player = 1
+        self.canonical_board = game.getCanonicalForm(self.board, self.current_player)
+        self.training_examples = []
+
+    def play(self, pi: list[float]) -> list[tuple[Board, list[float], float]] | None:
+        """
+        Records the search policy of the current position and plays a move sampled from it.
+
+        Once the search solves the position with its endgame solver, the game ends there and every
+        example takes its value from the solved result.
+
+        Args:
+            pi (list[float]): The search policy of the current position.
+
+        Returns:
+            list[(Board, list[float], float)] | None: The examples of the game once it has ended, None before.
+        """
+        game = self.game
+
+        # stored in this orientation only, training samples the symmetries
+        self.training_examples.append([self.canonical_board, self.current_player, pi, None])
+
+        solved = self.mcts.solve(self.canonical_board)
+        if solved is not None:
+            # the result under perfect play (0 for a draw), no need to play the moves left
+            result = solved[0]
+            return [(x[0], x[2], result * ((-1) ** (x[1] != self.current_player))) for x in self.training_examples]
+
+        action = np.random.choice(len(pi), p=pi)
+
+        self.board, self.current_player = game.nextState(self.board, self.current_player, action)
+        result = game.hasGameEnded(self.board, self.current_player)
+
+        # keep only the subtree of the move played
+        self.canonical_board = game.getCanonicalForm(self.board, self.current_player)
+        self.mcts.reroot(self.canonical_board)
+
+        if result != 0:
+            # a draw (2) is worth 0, like in the search
+            result = 0 if result == 2 else result
+            return [(x[0], x[2], result * ((-1) ** (x[1] != self.current_player))) for x in self.training_examples]
+        return None
+
+def runEpisode(game: Game, mcts: MCTS) -> list[tuple[Board, list[float], float]]:
+    """
+    Plays one game of self-play with an MCTS and collects its training examples.
+
+    Args:
+        game (Game): The game object.
+        mcts (MCTS): The search used for both players.
+
+    Returns:
+        training_examples (list[(Board, list[float], float)]): A list of examples of the form (canonical_board, probabilities, value).
+    """
+    episode = Episode(game, mcts)
+    while True:
+        examples = episode.play(mcts.simulate(episode.canonical_board))
+        if examples is not None:
+            return examples
+
+def runLockstepEpisodes(game: Game, model: OthelloModel, args, num_eps: int) -> list[list[tuple[Board, list[float], float]]]:
+    """
+    Plays episodes of self-play in lockstep, up to `args.lockstep_games` at a time in this process.
+
+    Every round advances each game's search by one simulation and evaluates the leaves of all
+    games with one forward pass. A game plays its move once its search reaches `args.num_sims`
+    simulations, or at once when its position is solved by the endgame solver; finished games are
+    replaced by new ones until `num_eps` have been started. Each game uses a fresh MCTS and produces
+    the same examples as `runEpisode`. With `args.mcts_stats`, the search of each move is reported to the
+    stats hooks like a `simulate` call, each forward pass counted in the statistics of the first game it serves.
+
+    Args:
+        game (Game): The game object.
+        model (OthelloModel): The model to play with.
+        args: Additional arguments for MCTS, with `lockstep_games`.
+        num_eps (int): The number of episodes.
+
+    Returns:
+        list: The training examples of each episode, in order of completion.
+    """
+    finished = []
+    started = 0
+    active = []   # [episode, simulations of the current move, start time of the move's search]
+
+    progress = tqdm(total=num_eps, desc="SelfPlay.lockstep")
+    while started < num_eps or active:
+        while started < num_eps and len(active) < args.lockstep_games:
+            active.append([Episode(game, MCTS(game, model, args)), 0, 0.0])
+            started += 1
+
+        # one simulation of every game, leaves shared between games evaluated once
+        leaves = {}
+        for entry in active:
+            episode = entry[0]
+            mcts = episode.mcts
+            if mcts.solve(episode.canonical_board) is not None:
+                # played from the endgame solver's result without searching
+                continue
+            if mcts.collect_stats and mcts.stats is None:
+                mcts.stats = SearchStats()
+                entry[2] = time.perf_counter()
+            mcts.root = mcts.stateKey(episode.canonical_board)
+            path, state, board, value = mcts.selectLeaf(episode.canonical_board)
+            # the round expanding the root of a move is not a simulation, as in `MCTS.simulate`
+            if path:
+                entry[1] += 1
+                if mcts.stats is not None:
+                    mcts.stats.recordLeaf(len(path), value is not None)
+            if value is None:
+                leaves.setdefault(state, (board, []))[1].append((mcts, path))
+            else:
+                # terminal node
+                mcts.backup(path, value)
+
+        if leaves:
+            states = list(leaves)
+            first_search = leaves[states[0]][1][0][0]
+            evaluations = first_search.evaluateBatch(states, [leaves[state][0] for state in states])
+            for state, (pi, value) in zip(states, evaluations):
+                board, searches = leaves[state]
+                for mcts, path in searches:
+                    mcts.addNode(state, board, pi)
+                    mcts.backup(path, -float(value))
+
+        still_active = []
+        for entry in active:
+            episode = entry[0]
+            if entry[1] < args.num_sims and episode.mcts.solve(episode.canonical_board) is None:
+                still_active.append(entry)
+                continue
+            if episode.mcts.stats is not None:
+                episode.mcts.finishStats(time.perf_counter() - entry[2], entry[1])
+            entry[1] = 0
+            examples = episode.play(episode.mcts.policy(episode.canonical_board))
+            if examples is None:
+                still_active.append(entry)
+            else:
+                finished.append(examples)
+                progress.update()
+        active = still_active
+
+    progress.close()
+    return finished
+
+class RemoteModel:
+    """
+    Stand-in for `OthelloModel` inside a self-play worker, forwarding evaluations to the inference server.
+
+    Attributes:
+        worker_id (int): The index of the worker, used to route the answers.
+        version (int): The weights version of the served model, for the evaluation cache.
+        thread_safe (bool): False, since concurrent requests would share the worker's pipe.
+    """
+
+    thread_safe = False
+
+    def __init__(self, worker_id: int, version: int, requests: mp.Queue, responses) -> None:
+        """
+        Initializes the proxy.
+
+        Args:
+            worker_id (int): The index of the worker.
+            version (int): The weights version of the served model.
+            requests (mp.Queue): The queue read by the inference server.
+            responses (Connection): The end of the pipe the server answers this worker on.
+        """
+        self.worker_id = worker_id
+        self.version = version
+        self.requests = requests
+        self.responses = responses
+
+    def predict(self, board: Board) -> tuple[np.ndarray, float]:
+        """
+        Predicts the policy and value for a given board state.
+
+        Args:
+            board (Board): The board state.
+
+        Returns:
+            tuple: A tuple containing the policy (array of probabilities) and the value (float).
+        """
+        pis, vs = self.predictBatch([board])
+        return pis[0], float(vs[0])
+
+    def predictBatch(self, boards: list[Board]) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Predicts the policies and values of several board states, batched by the server with other workers' requests.
+
+        Args:
+            boards (list[Board]): The board states.
+
+        Returns:
+            tuple: A tuple containing the policies (array of shape (B, action_size)) and the values (array of shape (B,)).
+        """
+        self.requests.put((self.worker_id, np.array([board.pieces for board in boards], dtype=np.int8)))
+        return self.responses.recv()
+
+def inferenceServer(size: int, state_dict: dict, requests: mp.Queue, responses: list, max_batch: int, timeout: float, stats: mp.Queue) -> None:
+    """
+    Serves network evaluations to the self-play workers until it reads None.
+
+    Requests are (worker_id, boards) pairs. After the first request of a batch, the server keeps
+    collecting requests until `max_batch` positions are pending or `timeout` seconds have passed,
+    then runs one forward pass and sends each worker its slice of the results.
+
+    Args:
+        size (int): The size of the board.
+        state_dict (dict): The weights of `OthelloNet`.
+        requests (mp.Queue): The queue of requests.
+        responses (list): The pipe connections to answer each worker on.
+        max_batch (int): The maximum number of positions per forward pass.
+        timeout (float): The seconds to wait for a batch to fill.
+        stats (mp.Queue): The queue the (batches, positions) counts are reported on when stopping.
+    """
+    model = OthelloModel(Game(size))
+    model.net.load_state_dict(state_dict)
+    model = InferenceModel(model, max_batch)
+
+    batches = positions = 0
+    running = True
+    while running:
+        request = requests.get()
+        if request is None:
+            break
+
+        pending = [request]
+        count = len(request[1])
+        deadline = time.perf_counter() + timeout
+        while count < max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                request = requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if request is None:
+                running = False
+                break
+            pending.append(request)
+            count += len(request[1])
+
+        pis, vs = model.predictArray(np.concatenate([boards for _, boards in pending]))
+        start = 0
+        for worker_id, boards in pending:
+            end = start + len(boards)
+            responses[worker_id].send((pis[start:end], vs[start:end]))
+            start = end
+
+        batches += 1
+        positions += count
+
+    stats.put((batches, positions))
+
+def selfPlayWorker(worker_id: int, size: int, args, version: int, num_eps: int, seed: int, requests: mp.Queue, responses, results: mp.Queue) -> None:
+    """
+    Plays self-play episodes with a fresh MCTS each, evaluating leaves through the inference server.
+
+    Args:
+        worker_id (int): The index of the worker.
+        size (int): The size of the board.
+        args: Additional arguments for MCTS.
+        version (int): The weights version of the served model.
+        num_eps (int): The number of episodes to play.
+        seed (int): The seed of the worker's move sampling.
+        requests (mp.Queue): The queue read by the inference server.
+        responses (Connection): The end of the pipe the server answers this worker on.
+        results (mp.Queue): The queue the examples of each episode are sent on, with the `SearchStats` of its
+            searches under `args.mcts_stats` (None otherwise).
+    """
+    np.random.seed(seed)
+    game = Game(size)
+    model = RemoteModel(worker_id, version, requests, responses)
+    for _ in range(num_eps):
+        mcts = MCTS(game, model, args)
+        examples = runEpisode(game, mcts)
+        results.put((examples, mcts.total_stats if mcts.collect_stats else None))
+
+class ParallelSelfPlay:
+    """
+    Runs self-play in `args.num_workers` worker processes sharing one batched inference server process.
+
+    Attributes:
+        game (Game): The game object.
+        args: Additional arguments, with `num_workers`, `inference_batch_size` and `inference_timeout`.
+        stats (dict): Throughput of the last run: games, seconds, games/hour, server batches and mean batch size.
+        search_stats (SearchStats): The search statistics of the workers in the last run, with `args.mcts_stats`.
+    """
+
+    # seconds between checks that the worker processes and the server are alive
+    POLL_SECONDS = 1.0
+
+    def __init__(self, game: Game, args) -> None:
+        """
+        Initializes the self-play pool.
+
+        Args:
+            game (Game): The game object.
+            args: Additional arguments.
+        """
+        self.game = game
+        self.args = args
+        self.stats = {}
+        self.search_stats = SearchStats()
+
+    def run(self, model: OthelloModel, num_eps: int, seed: int = None) -> list[list[tuple[Board, list[float], float]]]:
+        """
+        Plays episodes of self-play with the current weights of a model.
+
+        Args:
+            model (OthelloModel): The model to play with.
+            num_eps (int): The number of episodes.
+            seed (int): The base seed of the workers, random if not given.
+
+        Returns:
+            list: The training examples of each episode, in order of completion.
+        """
+        ctx = mp.get_context('spawn')
+        num_workers = self.args.num_workers
+        if seed is None:
+            seed = np.random.randint(2 ** 31 - num_workers)
+
+        # plain namespace so the workers do not need the module defining `args`
+        worker_args = types.SimpleNamespace(**vars(self.args))
+        state_dict = {k: v.cpu() for k, v in model.net.state_dict().items()}
+
+        requests = ctx.Queue()
+        results = ctx.Queue()
+        stats = ctx.Queue()
+        pipes = [ctx.Pipe(duplex=False) for _ in range(num_workers)]
+
+        server = ctx.Process(target=inferenceServer, args=(self.game.n, state_dict, requests, [send for _, send in pipes],
+                                                           self.args.inference_batch_size, self.args.inference_timeout, stats))
+        server.start()
+
+        workers = []
+        for worker_id in range(num_workers):
+            worker_eps = num_eps // num_workers + (worker_id < num_eps % num_workers)
+            worker = ctx.Process(target=selfPlayWorker, args=(worker_id, self.game.n, worker_args, model.version, worker_eps,
+                                                              seed + worker_id, requests, pipes[worker_id][0], results))
+            worker.start()
+            workers.append(worker)
+
+        self.search_stats = SearchStats()
+        start = time.perf_counter()
+        try:
+            episodes = self.collectEpisodes(results, workers, server, num_eps)
+        except RuntimeError:
+            # stop whatever is left instead of leaving it blocked on the queues
+            requests.put(None)
+            for worker in workers:
+                if worker.is_alive():
+                    worker.terminate()
+                worker.join()
+            server.join(timeout=self.POLL_SECONDS)
+            if server.is_alive():
+                server.terminate()
+                server.join()
+            raise
+        elapsed = time.perf_counter() - start
+
+        for worker in workers:
+            worker.join()
+        requests.put(None)
+        batches, positions = stats.get()
+        server.join()
+
+        self.stats = {
+            'games': num_eps,
+            'seconds': elapsed,
+            'games_per_hour': num_eps / elapsed * 3600,
+            'batches': batches,
+            'mean_batch': positions / batches if batches else 0.0,
+        }
+        print("Self-play: {games} games in {seconds:.1f}s ({games_per_hour:.0f} games/hour), "
+              "{batches} server batches of {mean_batch:.1f} positions on average".format(**self.stats))
+
+        return episodes
+
+    def collectEpisodes(self, results: mp.Queue, workers: list, server, num_eps: int) -> list[list[tuple[Board, list[float], float]]]:
+        """
+        Reads the episodes sent by the workers, checking every `POLL_SECONDS` that the processes are still alive.
+        Their search statistics are added to `search_stats`.
+
+        Args:
+            results (mp.Queue): The queue the workers send the examples of each episode on.
+            workers (list): The worker processes.
+            server (Process): The inference server process.
+            num_eps (int): The number of episodes to read.
+
+        Returns:
+            list: The training examples of each episode, in order of completion.
+
+        Raises:
+            RuntimeError: If a worker or the server died, or the workers exited before sending every episode.
+        """
+        episodes = []
+        progress = tqdm(total=num_eps, desc="ParallelSelfPlay.run")
+        try:
+            while len(episodes) < num_eps:
+                try:
+                    examples, stats = results.get(timeout=self.POLL_SECONDS)
+                    episodes.append(examples)
+                    if stats is not None:
+                        self.search_stats.merge(stats)
+                    progress.update()
+                    continue
+                except queue.Empty:
+                    pass
+
+                failed = [(worker_id, worker.exitcode) for worker_id, worker in enumerate(workers) if worker.exitcode not in (None, 0)]
+                if failed:
+                    raise RuntimeError("Self-play worker {} exited with code {}".format(*failed[0]))
+                if not server.is_alive():
+                    raise RuntimeError("Inference server exited with code {}".format(server.exitcode))
+                if all(worker.exitcode == 0 for worker in workers) and results.empty():
+                    raise RuntimeError("Self-play workers exited after {} of {} episodes".format(len(episodes), num_eps))
+        finally:
+            progress.close()
+        return episodes
\ No newline at end of file
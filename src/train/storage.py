@@ -0,0 +1,162 @@
+"""
+Append-only storage of training examples, one shard of flat arrays per iteration.
+
+A shard is three .npy files in the examples folder:
+    iter_0003.boards.npy  int8 boards of shape (N, n, n)
+    iter_0003.pis.npy     float32 (or float16) policies of shape (N, n * n + 1)
+    iter_0003.vs.npy      float32 values of shape (N,)
+and is opened with `np.load(mmap_mode='r')`, so nothing is unpickled and only the rows
+actually used are read from disk.
+
+Usage (converting a pickled history written by older versions of `Trainer.saveExamples`):
+    python -m src.train.storage temp/checkpoint_3.examples temp/examples
+"""
+from src.game.board import Board
+
+import os
+import re
+import sys
+import numpy as np
+from pickle import Unpickler
+
+SHARD_PATTERN = re.compile(r"iter_(\d+)\.boards\.npy$")
+
+class ExampleShard:
+    """
+    The training examples of one iteration as flat arrays, usable as a sequence of (Board, pi, v) tuples.
+
+    Attributes:
+        boards (np.ndarray): int8 boards of shape (N, n, n).
+        pis (np.ndarray): Policies of shape (N, action_size).
+        vs (np.ndarray): Values of shape (N,).
+    """
+
+    def __init__(self, boards: np.ndarray, pis: np.ndarray, vs: np.ndarray) -> None:
+        """
+        Initializes a shard from its arrays.
+
+        Args:
+            boards (np.ndarray): int8 boards of shape (N, n, n).
+            pis (np.ndarray): Policies of shape (N, action_size).
+            vs (np.ndarray): Values of shape (N,).
+        """
+        self.boards = boards
+        self.pis = pis
+        self.vs = vs
+
+    @classmethod
+    def fromExamples(cls, examples, pi_dtype=np.float32) -> 'ExampleShard':
+        """
+        Packs (Board, pi, v) examples into arrays.
+
+        Args:
+            examples: The examples.
+            pi_dtype: The dtype of the stored policies, float32 or float16.
+
+        Returns:
+            ExampleShard: The packed examples.
+        """
+        examples = list(examples)
+        boards = np.array([board.pieces for board, _, _ in examples], dtype=np.int8)
+        pis = np.array([pi for _, pi, _ in examples], dtype=pi_dtype)
+        vs = np.array([v for _, _, v in examples], dtype=np.float32)
+        return cls(boards, pis, vs)
+
+    def __len__(self) -> int:
+        return len(self.vs)
+
+    def __getitem__(self, i: int) -> tuple[Board, np.ndarray, float]:
+        board = Board(self.boards.shape[1])
+        board.pieces = self.boards[i].tolist()
+        return board, np.asarray(self.pis[i], dtype=np.float32), float(self.vs[i])
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def save(self, folder: str, iteration: int) -> None:
+        """
+        Writes the shard of an iteration.
+
+        Args:
+            folder (str): The examples folder.
+            iteration (int): The iteration the examples come from.
+        """
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+        prefix = os.path.join(folder, "iter_{:04d}".format(iteration))
+        # written under temporary names so an interrupted save never leaves a partial shard behind
+        for name, array in (('pis', self.pis), ('vs', self.vs), ('boards', self.boards)):
+            with open(prefix + "." + name + ".npy.tmp", "wb") as f:
+                np.save(f, np.ascontiguousarray(array))
+        for name in ('pis', 'vs', 'boards'):
+            os.replace(prefix + "." + name + ".npy.tmp", prefix + "." + name + ".npy")
+
+    @classmethod
+    def load(cls, folder: str, iteration: int) -> 'ExampleShard':
+        """
+        Opens the shard of an iteration as memory-mapped arrays.
+
+        Args:
+            folder (str): The examples folder.
+            iteration (int): The iteration of the shard.
+
+        Returns:
+            ExampleShard: The shard, read lazily from disk.
+        """
+        prefix = os.path.join(folder, "iter_{:04d}".format(iteration))
+        return cls(*(np.load(prefix + "." + name + ".npy", mmap_mode='r') for name in ('boards', 'pis', 'vs')))
+
+def listShards(folder: str) -> list[int]:
+    """
+    Lists the iterations that have a shard in a folder.
+
+    Args:
+        folder (str): The examples folder.
+
+    Returns:
+        list[int]: The iterations, in increasing order.
+    """
+    if not os.path.isdir(folder):
+        return []
+    return sorted(int(match.group(1)) for match in map(SHARD_PATTERN.match, os.listdir(folder)) if match)
+
+def loadShards(folder: str, last: int = None) -> list[ExampleShard]:
+    """
+    Opens the shards of a folder as memory-mapped arrays.
+
+    Args:
+        folder (str): The examples folder.
+        last (int): Only open the shards of the last iterations. Default is None, opening all of them.
+
+    Returns:
+        list[ExampleShard]: The shards, oldest first.
+    """
+    iterations = listShards(folder)
+    if last is not None:
+        iterations = iterations[-last:] if last > 0 else []
+    return [ExampleShard.load(folder, iteration) for iteration in iterations]
+
+def convertPickle(filename: str, folder: str, pi_dtype=np.float32) -> int:
+    """
+    Converts a pickled examples history (a list of per-iteration lists of (Board, pi, v)) into shards.
+
+    Args:
+        filename (str): The pickle file.
+        folder (str): The examples folder to write the shards to.
+        pi_dtype: The dtype of the stored policies.
+
+    Returns:
+        int: The number of shards written.
+    """
+    with open(filename, "rb") as f:
+        history = Unpickler(f).load()
+    for iteration, examples in enumerate(history):
+        ExampleShard.fromExamples(examples, pi_dtype).save(folder, iteration)
+    return len(history)
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print(__doc__)
+        sys.exit(1)
+    print("Wrote {} shards".format(convertPickle(sys.argv[1], sys.argv[2])))
\ No newline at end of file
@@ -1,17 +1,21 @@
 from src.game.game import Game
 from src.model.model import OthelloModel
+from src.model.cache import getEvaluationCache
+from src.model.inference import InferenceModel
 from src.game.board import Board
 from src.MCTS.mcts import MCTS
 from src.train.arena import Arena
+from src.train.selfplay import runEpisode, runLockstepEpisodes, ParallelSelfPlay
+from src.train.storage import ExampleShard, listShards, loadShards, convertPickle
+from src.train.replay import ReplayBuffer
+from src.MCTS.stats import StatsCollector, addStatsHook, removeStatsHook
 from src.train.players import *
 
 import os
-from random import shuffle
 import sys
 import numpy as np
 from tqdm import tqdm
 from collections import deque
-from pickle import Pickler, Unpickler
 
 class Trainer():
     def __init__(self, game: Game, model: OthelloModel, args) -> None:
@@ -31,7 +35,8 @@ class Trainer():
         self.player2_net = self.player1_net.__class__(self.game)
         self.args = args
         self.mcts = MCTS(self.game, self.player1_net, self.args)
-        self.training_examples_history = []
+        capacity = getattr(self.args, 'replay_capacity', None) or self.args.maxlen_queue * self.args.num_iters_history
+        self.replay = ReplayBuffer(capacity, self.game.n, self.game.getActionSize())
 
     def runEpisode(self) -> list[tuple[Board, list[float], float]]:
         """
@@ -40,30 +45,24 @@ class Trainer():
         Returns:
             training_examples (list[(Board, list[float], float)]): A list of examples of the form (canonical_board, probabilities, value).
         """
-        training_examples = []
-        board = self.game.getInitialBoard()
-        self.current_player = 1
-        episode_step = 0
+        return runEpisode(self.game, self.mcts)
 
-        while True:
-            episode_step += 1
-            canonical_board = self.game.getCanonicalForm(board, self.current_player)
-
-            pi = self.mcts.simulate(canonical_board)
-
-            symmetries = self.game.getSymmetries(canonical_board, pi)
-
-            for board, pi in symmetries:
-                training_examples.append([board, self.current_player, pi, None])
+    def searchModel(self, model: OthelloModel, in_process: bool = True) -> OthelloModel | InferenceModel:
+        """
+        Returns the evaluator searches use for a model: with `args.frozen_inference`, a frozen `InferenceModel`
+        of its current weights, which cannot be sent to worker processes.
 
-            action = np.random.choice(len(pi), p=pi)
+        Args:
+            model (OthelloModel): The model.
+            in_process (bool): Whether the searches run in this process.
 
-            board, self.current_player = self.game.nextState(board, self.current_player, action)
-            result = self.game.hasGameEnded(board, self.current_player)
+        Returns:
+            OthelloModel | InferenceModel: The evaluator.
+        """
+        if in_process and getattr(self.args, 'frozen_inference', False):
+            return InferenceModel(model)
+        return model
 
-            if result != 0:
-                return [(x[0], x[2], result * ((-1) ** (x[1] != self.current_player))) for x in training_examples]
-            
     def learn(self) -> None:
         """
         Performs num_iters iterations with num_eps episodes of self-play in each iteration.
@@ -75,35 +74,52 @@ class Trainer():
             if i > 1:
                 train_examples = deque([], maxlen=self.args.maxlen_queue)
                 
-                for _ in tqdm(range(self.args.num_eps), desc="SelfPlay.learn"):
-                    self.mcts = MCTS(self.game, self.player1_net, self.args)
-                    train_examples += self.runEpisode()
-
-                self.training_examples_history.append(train_examples)
-
-            if len(self.training_examples_history) > self.args.num_iters_history:
-                print("Clearing training examples history")
-                self.training_examples_history.pop(0)
-            
-            self.saveExamples(i - 1)
-
-            train_examples = []
-            for e in self.training_examples_history:
-                train_examples.extend(e)
-            
-            shuffle(train_examples)
+                collector = StatsCollector()
+                if getattr(self.args, 'mcts_stats', False):
+                    addStatsHook(collector)
+
+                if getattr(self.args, 'num_workers', 1) > 1:
+                    pool = ParallelSelfPlay(self.game, self.args)
+                    for examples in pool.run(self.player1_net, self.args.num_eps):
+                        train_examples += examples
+                    # the workers' searches report to hooks in their own processes
+                    collector.total.merge(pool.search_stats)
+                elif getattr(self.args, 'lockstep_games', 1) > 1:
+                    for examples in runLockstepEpisodes(self.game, self.searchModel(self.player1_net), self.args, self.args.num_eps):
+                        train_examples += examples
+                else:
+                    search_model = self.searchModel(self.player1_net)
+                    for _ in tqdm(range(self.args.num_eps), desc="SelfPlay.learn"):
+                        self.mcts = MCTS(self.game, search_model, self.args)
+                        train_examples += self.runEpisode()
+
+                shard = ExampleShard.fromExamples(train_examples, np.dtype(getattr(self.args, 'examples_pi_dtype', 'float32')))
+                iteration = self.saveExamples(shard)
+                self.replay.extend(shard, iteration)
+                if self.replay.evictIterations(self.args.num_iters_history):
+                    print("Clearing training examples history")
+
+                if getattr(self.args, 'mcts_stats', False):
+                    removeStatsHook(collector)
+                    print("Self-play search:", collector.total)
+
+                cache = getEvaluationCache()
+                if cache is not None:
+                    print("Evaluation cache: {} entries, hit rate {:.1%}".format(len(cache), cache.hitRate()))
 
             # TODO: change file and folder name
             self.player1_net.saveCheckpoint(folder=self.args.checkpoint, filename='temp.pth.tar')
             self.player2_net.loadCheckpoint(folder=self.args.checkpoint, filename='temp.pth.tar')
-            player2_mcts = MCTS(self.game, self.player2_net, self.args)
+            arena_workers = getattr(self.args, 'arena_workers', 1)
+            player2_mcts = MCTS(self.game, self.searchModel(self.player2_net, arena_workers <= 1), self.args)
 
-            self.player1_net.train(train_examples)
-            player1_mcts = MCTS(self.game, self.player1_net, self.args)
+            self.player1_net.train(self.replay)
+            player1_mcts = MCTS(self.game, self.searchModel(self.player1_net, arena_workers <= 1), self.args)
 
             arena = Arena(MCTSPlayer(player1_mcts), MCTSPlayer(player2_mcts), self.game)
 
-            p1_wins, p2_wins, draws = arena.playGames(self.args.arena_games)
+            p1_wins, p2_wins, draws = arena.playGames(self.args.arena_games, num_workers=arena_workers,
+                                                      seed=getattr(self.args, 'arena_seed', None))
 
             print("P1 Wins:", p1_wins)
             print("P2 Wins:", p2_wins)
@@ -117,40 +133,51 @@ class Trainer():
                 print("Accepting new model")
                 self.player1_net.saveCheckpoint(folder=self.args.checkpoint, filename='best.pth.tar')
 
-    def saveExamples(self, iter: int) -> None:
+    def saveExamples(self, examples) -> int:
         """
-        Saves the training examples to a file.
+        Appends the examples of the latest iteration to the examples folder as a new shard.
+
+        Earlier shards are never rewritten.
+
+        Args:
+            examples: The examples of the iteration, as an `ExampleShard` or (Board, pi, v) tuples.
 
         Returns:
-            None
+            int: The index of the written shard.
         """
         # TODO: change file name and folder name
-        folder = './temp/'
-        if not os.path.exists(folder):
-            os.makedirs(folder)
-        filename = os.path.join(folder, "checkpoint_" + str(iter) + ".examples")
-        with open(filename, "wb+") as f:
-            Pickler(f).dump(self.training_examples_history)
-        f.closed
+        folder = os.path.join('./temp/', 'examples')
+        shards = listShards(folder)
+        iteration = shards[-1] + 1 if shards else 0
+        if not isinstance(examples, ExampleShard):
+            examples = ExampleShard.fromExamples(examples, np.dtype(getattr(self.args, 'examples_pi_dtype', 'float32')))
+        examples.save(folder, iteration)
+        return iteration
 
     def loadExamples(self) -> None:
         """
-        Loads the training examples from a file.
+        Loads the training examples of the last `num_iters_history` iterations into the replay buffer.
+
+        A pickled history from older versions, next to the checkpoint, is converted to shards first.
 
         Returns:
             None
         """
         # TODO: change file name and folder name
-        modelFile = os.path.join(self.args.load_folder_file[0], self.args.load_folder_file[1])
-        examplesFile = modelFile + ".examples"
-        if not os.path.isfile(examplesFile):
-            print(examplesFile)
-            r = input("File with training examples not found. Continue? [y|n]")
+        folder = os.path.join(self.args.load_folder_file[0], 'examples')
+        examplesFile = os.path.join(self.args.load_folder_file[0], self.args.load_folder_file[1]) + ".examples"
+        if not listShards(folder) and os.path.isfile(examplesFile):
+            print("Converting", examplesFile, "to shards in", folder)
+            convertPickle(examplesFile, folder)
+
+        iterations = listShards(folder)[-self.args.num_iters_history:]
+        shards = loadShards(folder, last=self.args.num_iters_history)
+        if not shards:
+            print(folder)
+            r = input("Training examples not found. Continue? [y|n]")
             if r != "y":
                 sys.exit()
         else:
-            print("File with training examples found. Read it.")
-            with open(examplesFile, "rb") as f:
-                self.training_examples_history = Unpickler(f).load()
-            f.closed
-        
\ No newline at end of file
+            print("Training examples found: {} shards, {} examples.".format(len(shards), sum(map(len, shards))))
+            for iteration, shard in zip(iterations, shards):
+                self.replay.extend(shard, iteration)
\ No newline at end of file